@@ -1,8 +1,18 @@
 from words import *
 from wordle import Wordle, HIT, CLOSE, MISS
 import gametree as gt
+import hints
+import strategy
+import openingbook
+import results
+import search
+import guessmodes
+import constraints
+import profiling
+import multiboard
+import sampling
+import scoring
 from cli import print_guess_result
-from statistics import mean, median, mode
 from argparse import ArgumentParser
 from random import choice
 import multiprocessing
@@ -14,23 +24,39 @@ def next_guess(ws, top=1):
 
 
 def apply_hint(guess, hint, ws):
+    """
+    Keep the words in `ws` that would give `hint` for `guess`.
+
+    Greens fix letters in place, and yellows and greys rule letters out of
+    their positions. A letter's greens and yellows give its minimum count in
+    the target. A grey copy of a letter means there are no more copies than
+    that, so a letter that is only grey is absent.
+    """
     misses = []
     closes = []
     hits = []
+    found = {}
     for i, (letter, status) in enumerate(zip(guess,hint)):
         if status == MISS:
-            misses.append(letter)
+            misses.append((letter, i))
         elif status == HIT:
             hits.append((letter, i))
+            found[letter] = found.get(letter, 0) + 1
         elif status == CLOSE:
             closes.append((letter, i))
+            found[letter] = found.get(letter, 0) + 1
         else:
             raise RuntimeError("Unknown hint status " + str(status))
 
-    misses = ''.join(misses)
-    ws = omit_letters(misses, ws)
+    missed = {letter for letter, _ in misses}
+    absent = ''.join(letter for letter in missed if letter not in found)
+    counts = {letter: (n, n if letter in missed else None) for letter, n in found.items() if n > 1 or letter in missed}
+    ws = omit_letters(absent, ws)
     ws = with_letters_at_positions(hits, ws)
     ws = with_letters_not_at_positions(closes, ws)
+    ws = without_letters_at_positions(misses, ws)
+    if counts:
+        ws = with_letter_counts(counts, ws)
     return ws
 
 
@@ -39,12 +65,14 @@ def solve(w: Wordle, verbose=False, algorithm="best-first-two-guesses"):
         return solve_with_max_frequencies(w, verbose)
     elif algorithm == "best-first-two-guesses":
         return solve_with_best_first_two_guesses(w, verbose)
+    elif algorithm in search.MODES:
+        return solve_with_search(w, search.Searcher(mode=algorithm), verbose=verbose)[:2]
     else:
         return solve_with_max_frequencies(w, verbose)
 
 
 def solve_with_best_first_two_guesses(w: Wordle, verbose=False):
-    ws = get_words()
+    ws = all_words()
     while w.is_running():
         if verbose:
             print(f"--- Round {len(w.guesses) + 1}: {len(ws)} words remaining ---")
@@ -72,7 +100,19 @@ def solve_with_best_first_two_guesses(w: Wordle, verbose=False):
     return len(w.guesses), w.game_won
 
 
-def solve_with_max_entropy(w: Wordle, first_words=None, n=1, verbose=False):
+def check_predefined_guess(guess, path, guess_mode, node):
+    """
+    Raise ValueError if the predefined `guess` isn't allowed in `guess_mode`
+    after the guesses in `path` (see `guessmodes`)
+    """
+    history = [(_g, _h) for (_g, _h, _) in path[1:]]
+    if not guessmodes.is_legal_guess(guess, history, guess_mode, node):
+        raise ValueError(f"Predefined guess {guess!r} isn't allowed in {guess_mode} mode after "
+                         f"{' '.join(_g for _g, _ in history)}")
+
+
+def solve_with_max_entropy(w: Wordle, first_words=None, n=1, verbose=False, strategy=None, guess_mode='all',
+                           sampler=None):
     """
     The main AI for wordle, this succeeds for over 99% of test words.
 
@@ -82,21 +122,33 @@ def solve_with_max_entropy(w: Wordle, first_words=None, n=1, verbose=False):
     and associates each possible hint with the wordset of words that would give
     the particular hint given the guess.
 
+    If a compiled `strategy` is given, each turn is looked up in it instead,
+    falling back to computing entropies only if the game leaves the strategy.
+    The strategy supplies its own opener, so `first_words` defaults to none.
+
+    `guess_mode` restricts the guesses considered (see `guessmodes`): 'hard'
+    plays by hard mode rules and 'candidates' only guesses words that could
+    still be the answer. Compiled strategies and opening books assume any
+    guess is allowed, so they are only used in 'all' mode.
+
+    A `sampler` (see `sampling`) picks guesses at large nodes from sampled
+    entropy estimates instead of scoring every guess exactly.
     """
     path = []
     if first_words is None:
-        first_words = ["tares"]
+        first_words = default_first_words() if strategy is None else []
     elif first_words == '':
         first_words = []
     root = gt.Node()
     node = root
-    path.append(('', (0, 0, 0, 0, 0), node))
+    path.append(('', (MISS,) * word_length(), node))
     if verbose:
         print(f"First words={first_words}")
     for guess in first_words:
         if verbose:
             print(f"- {len(node)} words remaining")
             print(f"  - Applying predefined guess {guess}")
+        check_predefined_guess(guess, path, guess_mode, node)
         try:
             hint = w.guess(guess)
         except RuntimeError as e:
@@ -117,14 +169,29 @@ def solve_with_max_entropy(w: Wordle, first_words=None, n=1, verbose=False):
 
         if len(node) == 0:
             raise RuntimeError("No more guesses")
-        if len(node) == 1:
+        strategy_guess = None
+        if strategy is not None and guess_mode == 'all':
+            strategy_guess = strategy.next_guess([(_g, hints.encode_hint(_h)) for (_g, _h, _) in path[1:]])
+        if strategy_guess is not None:
+            g = strategy_guess
+            if verbose:
+                print(f"  - Applying strategy guess '{g}'")
+        elif len(node) == 1:
             g = node.remaining_words[0]
             if verbose:
                 print(f"  - Applying only remaining guess '{g}'")
         else:
-            if verbose:
-                print(f"  - Computing guesses with max entropies...'")
-            max_entropy_guesses = node.max_entropy_guesses(n=n)
+            max_entropy_guesses = None
+            if len(path) == 2 and guess_mode == 'all':
+                max_entropy_guesses = openingbook.second_guesses(path[1][0], path[1][1], n=n)
+                if verbose and max_entropy_guesses is not None:
+                    print(f"  - Using opening book for '{path[1][0]}'")
+            if max_entropy_guesses is None:
+                if verbose:
+                    print(f"  - Computing guesses with max entropies...'")
+                history = [(_g, _h) for (_g, _h, _) in path[1:]]
+                max_entropy_guesses, _ = constraints.best_guesses(history, lambda: node, n=n, guess_mode=guess_mode,
+                                                                  sampler=sampler)
             if verbose:
                 print(f"  - Potential guesses: {', '.join([f'{_g}: {_h:4.2f}' for _g, _h in max_entropy_guesses])}")
             (g, h) = random.choice(max_entropy_guesses)
@@ -145,6 +212,37 @@ def solve_with_max_entropy(w: Wordle, first_words=None, n=1, verbose=False):
 
     return len(w.guesses), w.game_won, path
 
+def solve_with_search(w: Wordle, searcher, first_words=None, verbose=False):
+    """
+    Solve with a `search.Searcher`, which picks the guess minimizing the
+    expected (or worst-case) number of guesses by branch-and-bound search
+    over the game tree, within a time budget per move. Guesses follow the
+    searcher's `guess_mode`.
+    """
+    if first_words is None:
+        first_words = default_first_words()
+    node = gt.Node()
+    path = [('', (MISS,) * word_length(), node)]
+    while w.is_running():
+        if len(node) == 0:
+            raise RuntimeError("No more guesses")
+        if first_words:
+            g, first_words = first_words[0], first_words[1:]
+            if verbose:
+                print(f"  - Applying predefined guess {g}")
+            check_predefined_guess(g, path, searcher.guess_mode, node)
+        else:
+            history = [(_g, _h) for (_g, _h, _) in path[1:]]
+            g, cost = searcher.best_guess(node, w.max_guesses - len(w.guesses), history)
+            if verbose:
+                print(f"- {len(node)} words remaining")
+                print(f"  - Applying {searcher.mode} search guess '{g}' (cost={cost})")
+        hint = w.guess(g)
+        node = node.play(g)[hint]
+        path.append((g, hint, node))
+    return len(w.guesses), w.game_won, path
+
+
 def solve_with_max_frequencies(w: Wordle, verbose=False):
     """
     Outdated AI for wordle, this computes the frequencies of letters and then
@@ -153,7 +251,7 @@ def solve_with_max_frequencies(w: Wordle, verbose=False):
 
     This is not good and should not be used :)
     """
-    ws = get_words()
+    ws = all_words()
     while w.is_running():
         if verbose:
             print(f"--- Round {len(w.guesses) + 1}: {len(ws)} words remaining ---")
@@ -190,11 +288,82 @@ def run_batch(n=500, verbose=False, word=None, max_guesses=6, algorithm='max-fre
     return runs
 
 
-def interactive(first_words=None, n=1):
+def _solve_target(args):
+    """
+    Pool worker: solve a single target word quietly and return a picklable
+    `(word, guesses, won, path)` tuple. The path holds `(guess, hint,
+    remaining_word_count)` triples rather than `Node`s so results stay small.
+    """
+    word, first_words, n, seed, search_options, guess_mode, sample_options = args
+    random.seed(f"{seed}:{word}")
+    w = Wordle(word)
+    if search_options is not None:
+        n_guesses, won, path = solve_with_search(w, search.Searcher(**search_options), first_words=first_words)
+    else:
+        sampler = sampling.Sampler(**sample_options) if sample_options is not None else None
+        n_guesses, won, path = solve_with_max_entropy(w, first_words=first_words, n=n, strategy=_worker_strategy,
+                                                      guess_mode=guess_mode, sampler=sampler)
+    return word, n_guesses, won, [(g, h, len(node)) for (g, h, node) in path]
+
+
+_worker_strategy = None
+
+
+def _init_worker(strategy_path=None, dictionary=None, max_matrix_bytes=hints.MAX_MATRIX_BYTES):
+    # Map the cached hint matrix and load the strategy once per worker rather
+    # than once per task
+    global _worker_strategy
+    if dictionary is not None:
+        set_dictionary(*dictionary)
+    hints.MAX_MATRIX_BYTES = max_matrix_bytes
+    hints.get_hint_matrix()
+    if strategy_path is not None:
+        _worker_strategy = strategy.load_strategy(strategy_path)
+
+
+def iter_parallel_batch(targets, first_words=None, n=1, workers=None, chunksize=None, seed=0, max_chunksize=64,
+                        strategy_path=None, search_options=None, guess_mode='all', sample_options=None):
+    """
+    Solve every word in `targets` with `solve_with_max_entropy` (or
+    `solve_with_search` if `search_options` are given), spreading
+    the games across a process pool, and yield each result as it completes.
+
+    Results come back in the order of `targets`, and each game seeds its own
+    RNG from `seed` and its target word, so a sweep is deterministic
+    regardless of the number of workers.
+
+    :param targets: the target words to solve
+    :param workers: number of worker processes (default: all CPU cores)
+    :param chunksize: number of targets sent to a worker at once (default:
+        a few chunks per worker, capped at `max_chunksize`)
+    :param strategy_path: a compiled strategy file for the workers to play
+    :param search_options: keyword arguments for a `search.Searcher`
+    :param guess_mode: the guess restriction (see `guessmodes.GUESS_MODES`)
+    :param sample_options: keyword arguments for a `sampling.Sampler` to
+        score large nodes approximately
+    :return: an iterator of `(word, guesses, won, path)` tuples
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if chunksize is None:
+        chunksize = max(1, min(max_chunksize, len(targets) // (4 * workers)))
+    tasks = ((word, first_words, n, seed, search_options, guess_mode, sample_options) for word in targets)
+    hints.get_hint_matrix()
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(strategy_path, get_dictionary(), hints.MAX_MATRIX_BYTES)) as pool:
+        for i, run in enumerate(pool.imap(_solve_target, tasks, chunksize=chunksize)):
+            yield run
+            if (i + 1) % 100 == 0 or i + 1 == len(targets):
+                print(f"[[[\033[32;1mSolved {i + 1} of {len(targets)}\033[0m]]]")
+
+
+def interactive(first_words=None, n=1, strategy=None, searcher=None, guess_mode='all', sampler=None):
     if first_words is None:
-        first_words = ['tares']
+        first_words = default_first_words() if strategy is None else []
+    history = []
     root = gt.Node()
     node = root
+    length = word_length()
 
     codes = {'G': HIT, 'g': HIT,
                 'Y': CLOSE, 'y': CLOSE,
@@ -210,13 +379,26 @@ def interactive(first_words=None, n=1):
                 row, words_to_print = words_to_print[:10], words_to_print[10:]
                 print("   \033[32;1;3m", (' '.join(row).upper()), "\033[0m")
 
+        hint_history = [(_g, hints.decode_hint(_c, length)) for _g, _c in history]
+        strategy_guess = None
+        if strategy is not None and guess_mode == 'all':
+            strategy_guess = strategy.next_guess(history)
         if len(first_words) > 0:
             suggestions = [first_words[0]]
             first_words = first_words[1:]
+        elif strategy_guess is not None:
+            suggestions = [strategy_guess]
         elif len(node) == 1:
             suggestions = list(node.remaining_words)
+        elif searcher is not None:
+            suggestions = [searcher.best_guess(node, gt.MAX_GUESSES - len(history), hint_history)[0]]
         else:
-            max_h_guesses = node.max_entropy_guesses(n=n)
+            max_h_guesses = None
+            if len(history) == 1 and guess_mode == 'all':
+                max_h_guesses = openingbook.second_guesses(history[0][0], hints.decode_hint(history[0][1], length), n=n)
+            if max_h_guesses is None:
+                max_h_guesses, _ = constraints.best_guesses(hint_history, lambda: node, n=n, guess_mode=guess_mode,
+                                                            sampler=sampler)
             suggestions = [x[0] for x in max_h_guesses]
         print(f"\033[34;1mSuggestions\033[0m: {' '.join(suggestions)} ")
 
@@ -225,12 +407,15 @@ def interactive(first_words=None, n=1):
             invalid_input = False
             g = input(f"(\033[34;1mEnter Guess\033[0m)> ")
             g2 = g.strip().replace(' ', '')
-            if len(g2) != 5:
+            if len(g2) != length:
                 invalid_input = True
                 print(f"    \033[31mInvalid guess:\033[0m {g}")
             if not is_valid_word(g2):
                 invalid_input = True
                 print(f"    \033[31mInvalid guess: not in words list:\033[0m {g}")
+            elif not guessmodes.is_legal_guess(g2, hint_history, guess_mode, node):
+                invalid_input = True
+                print(f"    \033[31mInvalid guess: not allowed in {guess_mode} mode:\033[0m {g}")
         try:
             hint = None
             invalid_input = True
@@ -244,7 +429,7 @@ def interactive(first_words=None, n=1):
                           " - 'Y' if it was \033[33;1myellow\033[0m, and\n"
                           " - 'B' if it was \033[1mblack\033[0m")
                     invalid_input = True
-                elif len(feedback) == 5:
+                elif len(feedback) == length:
                     for fb, let in zip(feedback, g):
                         if fb not in codes:
                             print(f"Invalid feedback character: {fb}")
@@ -253,38 +438,58 @@ def interactive(first_words=None, n=1):
                         hint.append(codes[fb])
                     hint = tuple(hint)
                 else:
-                    print("Invalid feedback: length must be 5")
+                    print(f"Invalid feedback: length must be {length}")
                     invalid_input = True
 
             print(f"    {print_guess_result(g, hint)}")
-            node = node.play(g)[hint]
+            node = node.play(g2)[hint]
+            history.append((g2, hints.encode_hint(hint)))
 
         except RuntimeError as e:
             print(str(e))
 
 
-def report_stats(runs):
-    no_runs = len(runs)
-    wins = [run for run in runs if run[2]]
-    losses = [run for run in runs if not run[2]]
-    no_wins = len(wins)
-    no_losses = len(losses)
-    n_guesses = [run[1] for run in runs]
-    mean_guesses_in_wins = mean(n_guesses)
-    mode_guesses_in_wins = mode(n_guesses)
-    median_guesses_in_wins = median(n_guesses)
-
-    print("Lost on the following words:")
-    for (word, guesses, w, path) in losses:
-        print("    ", word)
-    print(f"Runs: {no_runs}")
-    print(f"Wins: {no_wins} ({100 * no_wins / no_runs}%)    Losses: {no_losses} ({100 * no_losses / no_runs}%)")
-    print(f"Num Guesses")
-    print(f"    Min:    {min(n_guesses)}")
-    print(f"    Max:    {max(n_guesses)}")
-    print(f"    Mean:   {mean_guesses_in_wins}")
-    print(f"    Median: {median_guesses_in_wins}")
-    print(f"    Mode:   {mode_guesses_in_wins}")
+def record_runs(runs, results_path=None):
+    """
+    Fold runs into running statistics as they arrive, optionally streaming
+    each one to `results_path` (JSON Lines, or CSV for a .csv path), then
+    report the statistics. Runs are not kept in memory.
+    """
+    stats = results.RunningStats()
+    writer = results.ResultWriter(results_path) if results_path is not None else None
+    try:
+        for run in runs:
+            stats.add(run)
+            if writer is not None:
+                writer.write(run)
+    finally:
+        if writer is not None:
+            writer.close()
+    stats.report()
+
+
+def profile_targets():
+    """
+    The solver phases timed by --profile: hint lookup, partitioning,
+    entropy scoring and the caches and books in front of them
+    """
+    return [(hints, 'get_hint_matrix'),
+            (hints.HintMatrix, 'hint_codes'),
+            (hints.HintMatrix, 'columns'),
+            (Wordle, 'guess'),
+            (constraints, 'best_guesses'),
+            (openingbook, 'second_guesses'),
+            (gt.Node, '__init__'),
+            (gt.Node, 'play'),
+            (gt.Node, '_sorted_partition'),
+            (gt.Node, 'partition'),
+            (gt.Node, 'max_entropy_guesses'),
+            (scoring, 'pruned_guess_entropies'),
+            (scoring, 'guess_entropies'),
+            (scoring, 'hint_counts'),
+            (scoring, 'entropies_of_counts'),
+            (sampling.Sampler, 'guess_entropies'),
+            (search.Searcher, 'best_guess')]
 
 
 def main():
@@ -296,41 +501,210 @@ def main():
     parser.add_argument("-n", "--num_choices", type=int, default=1, help="Number of choices to consider at each step")
     parser.add_argument("-b", "--batches", action='store_true', help="Run batches")
     parser.add_argument("--first_words", default=None, help="First words to guess")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker processes for batch runs (default: all cores; 1 runs serially)")
+    parser.add_argument("--all_words", action='store_true', help="With --batches, solve every word in the word list")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for batch runs")
+    parser.add_argument("--search", default="entropy", choices=("entropy",) + search.MODES,
+                        help="Pick guesses by max entropy, or by searching for the fewest expected/worst-case guesses")
+    parser.add_argument("--time_budget", type=float, default=5.0, help="Seconds per move for --search")
+    parser.add_argument("--breadth", type=int, default=5, help="Candidate guesses tried per state for --search")
+    parser.add_argument("--results", default=None, metavar="PATH",
+                        help="Stream each batch game to PATH as JSON Lines (or CSV if PATH ends in .csv)")
+    parser.add_argument("--compile_strategy", default=None, metavar="PATH",
+                        help="Compile the max-entropy decision tree from --opener and save it to PATH")
+    parser.add_argument("--compile_opening_book", action="store_true",
+                        help="Compute the best second guesses after --opener and save them as its opening book")
+    parser.add_argument("--opener", default=DEFAULT_OPENER,
+                        help="Opening word used by --compile_strategy and --compile_opening_book")
+    parser.add_argument("--strategy", default=None, metavar="PATH", help="Play using a compiled strategy file")
+    parser.add_argument("--guess_mode", default="all", choices=guessmodes.GUESS_MODES,
+                        help="Guess any word, play by hard mode rules, or only guess possible answers")
+    parser.add_argument("--dictionary", default=None, metavar="PATH",
+                        help="Word file to play with, or the name of one in wordfiles/ (default: the Wordle words)")
+    parser.add_argument("--word_length", type=int, default=WORD_LENGTH, help="Length of the words to play with")
+    parser.add_argument("--max_matrix_mb", type=float, default=None,
+                        help="Largest hint matrix to precompute; bigger word lists compute hints as they are scored")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Pick guesses at large nodes from entropies estimated on samples of the words")
+    parser.add_argument("--sample_error", type=float, default=0.1,
+                        help="Largest error (in nats, at 95%% confidence) of the leading estimates for --approximate")
+    parser.add_argument("--finalists", type=int, default=32,
+                        help="Guesses scored exactly after sampling with --approximate")
+    parser.add_argument("--boards", type=int, default=1,
+                        help="Solve this many boards at once (2 for Dordle, 4 for Quordle); batches run serially")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time the solver's phases and print a breakdown (batches run serially)")
+    parser.add_argument("--profile_output", default=None, metavar="PATH",
+                        help="Profile as with --profile, and also run cProfile and dump its pstats to PATH")
 
 
     args = parser.parse_args()
+    if args.dictionary is not None or args.word_length != WORD_LENGTH:
+        set_dictionary(args.dictionary, args.word_length)
+    if args.max_matrix_mb is not None:
+        hints.MAX_MATRIX_BYTES = int(args.max_matrix_mb * 2 ** 20)
+    if not args.profile and args.profile_output is None:
+        run_from_args(args)
+        return
 
+    # Workers run in other processes, out of the profiler's reach. Serial
+    # batches play the same targets with the same per-game seeds, so the
+    # profile measures the workload of the parallel run
+    args.workers = 1
+    profiler = profiling.Profiler(profile_targets(), cprofile=args.profile_output is not None)
+    with profiler:
+        run_from_args(args)
+    profiler.report()
+    if args.profile_output is not None:
+        profiler.dump_stats(args.profile_output)
+        print(f"Saved cProfile stats to {args.profile_output} (top entries below)")
+        profiler.print_stats()
+
+
+def run_from_args(args):
     first_words = args.first_words
     if first_words is not None:
         first_words = first_words.split(' ')
         for word in first_words:
-            if len(word) != 5:
-                raise ValueError(f"Invalid word {word}: must be length 5")
+            if len(word) != word_length():
+                raise ValueError(f"Invalid word {word}: must be length {word_length()}")
             if word not in get_words():
                 raise ValueError(f"Invalid word {word}: not part of wordlist")
+        if args.guess_mode != 'all' and len(first_words) > 1:
+            # Whether later words are legal depends on the hints
+            raise ValueError(f"--first_words can only give one word with --guess_mode {args.guess_mode}")
+
+    if args.boards > 1:
+        # Multi-board games are solved serially by summed entropy alone
+        unsupported = [flag for flag, used in (("--guess_mode", args.guess_mode != 'all'),
+                                               ("--strategy", args.strategy is not None),
+                                               ("--search", args.search != "entropy"),
+                                               ("--approximate", args.approximate),
+                                               ("--workers", args.workers not in (None, 1)),
+                                               ("--all_words", args.all_words),
+                                               ("--interactive", args.interactive)) if used]
+        if unsupported:
+            raise ValueError(f"--boards doesn't support {', '.join(unsupported)}")
+    if args.search != "entropy":
+        # Searches pick every guess themselves, by cost rather than entropy
+        unsupported = [flag for flag, used in (("--strategy", args.strategy is not None),
+                                               ("--approximate", args.approximate)) if used]
+        if unsupported:
+            raise ValueError(f"--search doesn't support {', '.join(unsupported)}")
+
+    if args.compile_strategy is not None:
+        compiled = strategy.compile_strategy(opener=args.opener, verbose=args.verbose)
+        compiled.save(args.compile_strategy)
+        print(f"Saved strategy with {len(compiled)} states to {args.compile_strategy}")
+        return
+
+    if args.compile_opening_book:
+        book = openingbook.compile_opening_book(args.opener, verbose=args.verbose)
+        openingbook.save_opening_book(args.opener, book)
+        print(f"Saved opening book with {len(book)} hints to {openingbook.book_path(args.opener)}")
+        return
+
+    strat = None
+    if args.strategy is not None:
+        strat = strategy.load_strategy(args.strategy)
+    search_options = None
+    if args.search != "entropy":
+        search_options = dict(mode=args.search, breadth=args.breadth, time_budget=args.time_budget,
+                              guess_mode=args.guess_mode)
+    sample_options = None
+    if args.approximate:
+        sample_options = dict(error=args.sample_error, finalists=args.finalists, seed=args.seed)
+
+    if args.boards > 1:
+        if args.batches:
+            def multi_runs():
+                for i in range(args.batch_size):
+                    print(f"[[[\033[32;1mBatch {i+1} of {args.batch_size}\033[0m]]]")
+                    yield test_multi(num_boards=args.boards, n=args.num_choices, verbose=args.verbose,
+                                     first_words=first_words)
+            record_runs(multi_runs(), args.results)
+        else:
+            targets = None if args.word is None else args.word.split(' ')
+            test_multi(targets, num_boards=args.boards, n=args.num_choices, verbose=args.verbose,
+                       first_words=first_words)
+        return
 
     if args.interactive:
-        interactive(n=args.num_choices, first_words=first_words)
+        searcher = search.Searcher(**search_options) if search_options is not None else None
+        sampler = sampling.Sampler(**sample_options) if sample_options is not None else None
+        interactive(n=args.num_choices, first_words=first_words, strategy=strat, searcher=searcher,
+                    guess_mode=args.guess_mode, sampler=sampler)
         return
+
+    targets = None
+    if args.batches:
+        if args.all_words:
+            targets = sorted(get_words())
+        elif args.word is not None:
+            targets = [args.word] * args.batch_size
+        else:
+            rng = random.Random(args.seed)
+            ws = get_words()
+            targets = [rng.choice(ws) for _ in range(args.batch_size)]
+
+    if args.batches and args.workers != 1:
+        runs = iter_parallel_batch(targets, first_words=first_words, n=args.num_choices,
+                                   workers=args.workers, seed=args.seed, strategy_path=args.strategy,
+                                   search_options=search_options, guess_mode=args.guess_mode,
+                                   sample_options=sample_options)
+        record_runs(runs, args.results)
     elif args.batches:
-        runs = []
-        for i in range(args.batch_size):
-            print(f"[[[\033[32;1mBatch {i+1} of {args.batch_size}\033[0m]]]")
-            runs.append(test(word=args.word, n=args.num_choices,
-                verbose=args.verbose, first_words=first_words,
-                print_summary=False))
-        report_stats(runs)
+        def serial_runs():
+            for i, word in enumerate(targets):
+                print(f"[[[\033[32;1mBatch {i+1} of {len(targets)}\033[0m]]]")
+                # Seeded per word as in `_solve_target`, so serial and
+                # parallel sweeps play the same games
+                random.seed(f"{args.seed}:{word}")
+                yield test(word=word, n=args.num_choices,
+                    verbose=args.verbose, first_words=first_words,
+                    print_summary=False, strategy=strat, search_options=search_options,
+                    guess_mode=args.guess_mode, sample_options=sample_options)
+        record_runs(serial_runs(), args.results)
 
     else:
-        test(word=args.word, verbose=args.verbose, first_words=first_words)
+        test(word=args.word, verbose=args.verbose, first_words=first_words, strategy=strat,
+             search_options=search_options, guess_mode=args.guess_mode, sample_options=sample_options)
 
-def test(word=None, first_words=None, n=1, verbose=False, print_summary=True, remaining_words_print_threshold=100):
+def test_multi(targets=None, num_boards=4, first_words=None, n=1, verbose=False):
+    """
+    Play one multi-board game; `targets` defaults to `num_boards` random words
+    """
+    game = multiboard.MultiWordle(targets, num_boards=num_boards)
+    print(f"  + \033[1mWords To Guess\033[0m: \033[94;1m{' '.join(game.targets).upper()}\033[0m")
+    n_guesses, won, path = multiboard.solve_multi(game, first_words=first_words, n=n, verbose=verbose)
+    for guess_no, (guess, board_hints, remaining) in enumerate(path):
+        results = '  '.join('-' * len(guess) if h is None else print_guess_result(guess, h) for h in board_hints)
+        counts = ' '.join('-' if r is None else str(r) for r in remaining)
+        print(f"    [\033[32;1m{guess_no + 1}\033[0m] {results}   ({counts} Words Remaining)")
+    if won:
+        print(f"  + \033[32;1mWon\033[0;1m with {n_guesses} guesses\033[0m")
+    else:
+        print(f"  + \033[31;1mLost with {n_guesses} guesses\033[0m")
+    # Runs are recorded without a path: the per-board hints don't fit the
+    # single-board result format
+    return ' '.join(game.targets), n_guesses, won, []
+
+
+def test(word=None, first_words=None, n=1, verbose=False, print_summary=True, remaining_words_print_threshold=100,
+         strategy=None, search_options=None, guess_mode='all', sample_options=None):
     if word is None:
         print("  Choosing random word...")
         word = get_random_word()
     print(f"  + \033[1mWord To Guess\033[0m: \033[94;1m{word.upper()}\033[0m")
     w = Wordle(word)
-    n_guesses, won, path = solve_with_max_entropy(w, first_words=first_words, n=n, verbose=verbose)
+    if search_options is not None:
+        n_guesses, won, path = solve_with_search(w, search.Searcher(**search_options), first_words=first_words,
+                                                 verbose=verbose)
+    else:
+        sampler = sampling.Sampler(**sample_options) if sample_options is not None else None
+        n_guesses, won, path = solve_with_max_entropy(w, first_words=first_words, n=n, verbose=verbose,
+                                                      strategy=strategy, guess_mode=guess_mode, sampler=sampler)
     if won:
         print(f"  + \033[32;1mWon\033[0;1m with {n_guesses} guesses\033[0m")
     else:
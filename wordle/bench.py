@@ -0,0 +1,208 @@
+"""
+Benchmarks for the solver's hot paths.
+
+Each benchmark produces one metric; results are written as JSON and can be
+compared against a stored baseline, failing if any metric regressed by more
+than the tolerance.
+
+    python bench.py --output bench.json --save_baseline
+    python bench.py --output bench.json --baseline bench_baseline.json
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from argparse import ArgumentParser
+
+import ai
+import constraints
+import gametree as gt
+import words
+from check_startup import measure_import_time
+from wordle import Wordle
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def _timed(f, min_time=1.0):
+    """
+    Call `f` repeatedly for at least `min_time` seconds; return (calls, seconds)
+    """
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        f()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls, elapsed
+
+
+def bench_hints(rng, min_time=1.0):
+    ws = words.get_words()
+    pairs = [(rng.choice(ws), rng.choice(ws)) for _ in range(1000)]
+
+    def run():
+        for target, guess in pairs:
+            gt.get_hint_for_word_from_guess(target, guess)
+
+    calls, elapsed = _timed(run, min_time)
+    return {"hint_calls_per_sec": (calls * len(pairs) / elapsed, "calls/s", True)}
+
+
+def depth_two_nodes(rng, opener="tares", count=5):
+    """
+    Return `count` typical depth-2 nodes: the node reached after the opener
+    for a random target
+    """
+    ws = words.get_words()
+    root = gt.Node()
+    nodes = []
+    for target in rng.sample(ws, count):
+        hint = gt.get_hint_for_word_from_guess(target, opener)
+        nodes.append(root.play(opener)[hint])
+    return nodes
+
+
+def bench_entropies(rng, min_time=1.0):
+    root = gt.Node()
+    _, elapsed = _timed(root.compute_guess_entropies, min_time=0)
+    nodes = depth_two_nodes(rng)
+    latencies = []
+    for node in nodes:
+        calls, node_elapsed = _timed(node.compute_guess_entropies, min_time / len(nodes))
+        latencies.append(node_elapsed / calls)
+    return {
+        "entropies_root_latency": (elapsed, "s", False),
+        "entropies_depth2_latency": (sum(latencies) / len(latencies), "s", False),
+    }
+
+
+def bench_apply_hint(rng, min_time=1.0):
+    ws = words.get_words()
+    cases = []
+    for _ in range(100):
+        target, guess = rng.choice(ws), rng.choice(ws)
+        cases.append((guess, gt.get_hint_for_word_from_guess(target, guess)))
+
+    def run():
+        for guess, hint in cases:
+            ai.apply_hint(guess, hint, words.all_words())
+
+    calls, elapsed = _timed(run, min_time)
+    return {"apply_hint_per_sec": (calls * len(cases) / elapsed, "calls/s", True)}
+
+
+def bench_solvers(rng, games=20):
+    targets = [rng.choice(words.get_words()) for _ in range(games)]
+    solvers = {
+        "max_entropy": lambda w: ai.solve_with_max_entropy(w),
+        "max_frequency": lambda w: ai.solve_with_max_frequencies(w),
+    }
+    result = {}
+    for name, solver in solvers.items():
+        random.seed(0)
+        # Measure cold solves rather than cache hits
+        gt.TRANSPOSITIONS.clear()
+        constraints.BEST_GUESSES.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for target in targets:
+                solver(Wordle(target))
+        elapsed = time.perf_counter() - start
+        result[f"solve_{name}_games_per_sec"] = (games / elapsed, "games/s", True)
+    return result
+
+
+def bench_startup(rng, runs=5):
+    times = measure_import_time("ai", runs)
+    return {"import_ai_latency": (sorted(times)[len(times) // 2], "s", False)}
+
+
+BENCHMARKS = {
+    "hints": bench_hints,
+    "entropies": bench_entropies,
+    "apply_hint": bench_apply_hint,
+    "solvers": bench_solvers,
+    "startup": bench_startup,
+}
+
+
+def run_benchmarks(names=None, seed=0):
+    """
+    Run the named benchmarks (default: all) and return a JSON-able report
+    """
+    if names is None:
+        names = list(BENCHMARKS)
+    metrics = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        for metric, (value, unit, higher_is_better) in BENCHMARKS[name](random.Random(seed)).items():
+            metrics[metric] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "metrics": metrics,
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Return the metrics in `report` that are more than `tolerance` (a
+    fraction) worse than in `baseline`, as (name, baseline, current) triples
+    """
+    regressions = []
+    for name, current in report["metrics"].items():
+        if name not in baseline["metrics"]:
+            continue
+        base = baseline["metrics"][name]["value"]
+        value = current["value"]
+        if current["higher_is_better"]:
+            regressed = value < base * (1 - tolerance)
+        else:
+            regressed = value > base * (1 + tolerance)
+        if regressed:
+            regressions.append((name, base, value))
+    return regressions
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-o", "--output", default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="Compare against this baseline report")
+    parser.add_argument("--save_baseline", action="store_true", help="Save the report as the baseline")
+    parser.add_argument("--baseline_path", default=DEFAULT_BASELINE, help="Where --save_baseline writes")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional regression")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=None, help="Benchmarks to run")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for workloads")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.only, seed=args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    if args.save_baseline:
+        with open(args.baseline_path, 'w') as f:
+            f.write(text)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for name, base, value in regressions:
+            print(f"REGRESSION {name}: {base:.6g} -> {value:.6g}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
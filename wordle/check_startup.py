@@ -0,0 +1,51 @@
+"""
+Check that importing the solver stays within its startup-time budget.
+
+Each run imports `ai` in a fresh interpreter and times the import itself;
+the median over all runs must be under the budget. Exits with status 1 if
+the budget is exceeded, so it can gate CI.
+
+    python check_startup.py --budget 0.3 --runs 5
+"""
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from statistics import median
+
+STARTUP_BUDGET = 0.3
+
+_TIMED_IMPORT = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def measure_import_time(module="ai", runs=5):
+    """
+    Return the import time in seconds of `module` in each of `runs` fresh
+    interpreters
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _TIMED_IMPORT.format(module=module)],
+                             cwd=cwd, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip()))
+    return times
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="Maximum median import time in seconds")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    parser.add_argument("--module", default="ai", help="Module to import")
+    args = parser.parse_args()
+
+    times = measure_import_time(args.module, args.runs)
+    t = median(times)
+    print(f"import {args.module}: median {t * 1000:.1f}ms over {args.runs} runs (budget {args.budget * 1000:.0f}ms)")
+    if t > args.budget:
+        print("Startup budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Canonical game states.
+
+The words remaining after a game depend only on what its hints revealed,
+not on the order or choice of guesses. `Constraints` reduces a `(guess,
+hint)` history to those facts: the green letter at each position, each
+letter's minimum and maximum count, and the positions each letter is
+banned from. Redundant facts are dropped so histories that pin down the same
+constraints get equal keys.
+
+`best_guesses` caches the best guesses by that key in a bounded LRU, so a
+state reached again along any path is answered without walking or scoring
+the game tree.
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import gametree as gt
+import guessmodes
+import hints
+import words
+from hints import HIT, CLOSE
+
+BEST_GUESSES = gt.TranspositionTable(max_size=10_000)
+
+
+class Constraints:
+    def __init__(self, greens: Tuple[str, ...], min_counts: Dict[str, int], max_counts: Dict[str, int],
+                 banned: Dict[str, Set[int]]):
+        self.greens = greens
+        self.min_counts = min_counts
+        self.max_counts = max_counts
+        self.banned = banned
+        self.key = self._canonical_key()
+
+    @classmethod
+    def from_history(cls, history: List[Tuple[str, Tuple[int, ...]]], length=None) -> 'Constraints':
+        if length is None:
+            length = len(history[0][0]) if history else words.word_length()
+        greens = [''] * length
+        min_counts = {}
+        max_counts = {}
+        banned = {}
+        for guess, hint in history:
+            found = {}
+            missed = set()
+            for i, (let, status) in enumerate(zip(guess, hint)):
+                if status == HIT:
+                    greens[i] = let
+                else:
+                    # Yellow or grey, the letter isn't at this position
+                    banned.setdefault(let, set()).add(i)
+                if status in (HIT, CLOSE):
+                    found[let] = found.get(let, 0) + 1
+                else:
+                    missed.add(let)
+            for let, k in found.items():
+                min_counts[let] = max(min_counts.get(let, 0), k)
+            for let in missed:
+                max_counts[let] = min(max_counts.get(let, length), found.get(let, 0))
+        return cls(tuple(greens), min_counts, max_counts, banned)
+
+    def _canonical_key(self) -> tuple:
+        green_counts = {}
+        for let in self.greens:
+            if let:
+                green_counts[let] = green_counts.get(let, 0) + 1
+        banned = []
+        for let, positions in self.banned.items():
+            if self.max_counts.get(let) == 0 or self.max_counts.get(let, -1) == green_counts.get(let, 0):
+                # Absent, or every copy is green: bans add nothing
+                continue
+            positions = tuple(sorted(p for p in positions if not self.greens[p]))
+            if positions:
+                banned.append((let, positions))
+        return (self.greens,
+                tuple(sorted((let, k) for let, k in self.min_counts.items() if k > 0)),
+                tuple(sorted(self.max_counts.items())),
+                tuple(sorted(banned)))
+
+    def matches(self, word) -> bool:
+        """
+        Whether `word` satisfies every constraint
+        """
+        if any(g and g != let for g, let in zip(self.greens, word)):
+            return False
+        for let, positions in self.banned.items():
+            if any(word[p] == let for p in positions):
+                return False
+        for let, k in self.min_counts.items():
+            if word.count(let) < k:
+                return False
+        for let, k in self.max_counts.items():
+            if word.count(let) > k:
+                return False
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, Constraints) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+def best_guesses(history, node_of: Callable[[], gt.Node], n=1, guess_mode='all',
+                 cache: Optional[gt.TranspositionTable] = None, sampler=None) -> Tuple[List[Tuple[str, float]], int]:
+    """
+    Return the top `n` guesses after `history` and the number of words
+    remaining, from the cache if these constraints were seen before and
+    otherwise by scoring the node returned by `node_of()` (approximately
+    if a `sampling.Sampler` is given)
+    """
+    cache = BEST_GUESSES if cache is None else cache
+    key = (hints.get_hint_matrix().key, Constraints.from_history(history).key, n, guess_mode,
+           None if sampler is None else sampler.key)
+    cached = cache.get(key)
+    if cached is None:
+        node = node_of()
+        legal = guessmodes.legal_guess_ids(node, history, guess_mode)
+        cached = (node.max_entropy_guesses(n=n, guess_ids=legal, sampler=sampler), len(node))
+        cache.put(key, cached)
+    guesses, remaining = cached
+    return list(guesses), remaining
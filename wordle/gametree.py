@@ -1,18 +1,19 @@
 from typing import List, Tuple, Dict
-from wordle import HIT, CLOSE, MISS
-import words
+from collections import OrderedDict
+from collections.abc import Mapping
+import hashlib
+import os
+import pickle
+from hints import HIT, CLOSE, MISS
+import hints
+import scoring
+import numpy as np
 from math import log, inf
 
+MAX_GUESSES = 6
+
 def get_hint_for_word_from_guess(target_word, guess):
-    result = []
-    for (tc, gc) in zip(target_word, guess):
-        if tc == gc:
-            result.append(HIT)
-        elif gc in target_word:
-            result.append(CLOSE)
-        else:
-            result.append(MISS)
-    return tuple(result)
+    return hints.hint_tuple(target_word, guess)
 
 def entropy(xs, base=None):
     total = sum(xs)
@@ -27,40 +28,251 @@ def entropy(xs, base=None):
 def entropy_of_wordsets(wordsets, base=None):
     return entropy([len(ws) for ws in wordsets], base=base)
 
+def state_fingerprint(word_ids, salt=b'') -> bytes:
+    """
+    A canonical key for a set of remaining words: the hash of their sorted
+    answer ids, so the same set reached along different paths gets the same
+    key. `salt` (e.g. the hint matrix key) separates ids of different word
+    lists.
+    """
+    ids = np.sort(np.asarray(word_ids, dtype=np.int32))
+    h = hashlib.blake2b(salt, digest_size=16)
+    h.update(ids.tobytes())
+    return h.digest()
+
+
+class TranspositionTable:
+    """
+    A size-capped LRU cache of best-guess results keyed by state fingerprint
+    """
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+TRANSPOSITIONS = TranspositionTable()
+
+
+def checkpoint_path(checkpoint_dir, path, hint_matrix=None) -> str:
+    """
+    The checkpoint file for the subtree reached by `path`, a sequence of
+    `(guess, hint_code)` pairs. The name includes the hint encoding version
+    and the key of the word lists (default: the active hint matrix's), so
+    checkpoints written for other word lists are never resumed from.
+    """
+    m = hints.get_hint_matrix() if hint_matrix is None else hint_matrix
+    name = '-'.join(f"{guess}.{code}" for guess, code in path) or 'root'
+    return os.path.join(checkpoint_dir, f"subtree.v{hints.CACHE_VERSION}.{m.key}-{name}.pkl")
+
+
+def save_checkpoint(node: 'Node', checkpoint_file):
+    data = {"hints_version": hints.CACHE_VERSION, "words_hash": node.hint_matrix.key, "node": node}
+    tmp_file = f"{checkpoint_file}.tmp"
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def load_checkpoint(checkpoint_file) -> 'Node':
+    """
+    Load a checkpointed subtree. Its nodes use the active hint matrix, so
+    the checkpoint must have been built for the same word lists and hint
+    encoding.
+    """
+    with open(checkpoint_file, 'rb') as f:
+        data = pickle.load(f)
+    if (not isinstance(data, dict) or data.get("hints_version") != hints.CACHE_VERSION
+            or data.get("words_hash") != hints.get_hint_matrix().key):
+        raise ValueError(f"Checkpoint {checkpoint_file} was built for a different word list or hint encoding")
+    return data["node"]
+
+
+class Children(Mapping):
+    """
+    The children of a node for one guess, as a lazy map from hint to `Node`.
+
+    Only the partition is stored: the parent's word ids sorted by hint code,
+    and where each code's run starts and ends. A child `Node` is created on
+    first access, with a slice of the sorted ids (a view, not a copy) as its
+    words.
+    """
+    def __init__(self, sorted_ids: np.ndarray, codes: np.ndarray, bounds: np.ndarray, depth, hint_matrix=None):
+        self.sorted_ids = sorted_ids
+        self.codes = codes
+        self.bounds = bounds
+        self.depth = depth
+        self.hint_matrix = hints.get_hint_matrix() if hint_matrix is None else hint_matrix
+        self._index = {int(code): i for i, code in enumerate(codes)}
+        self._nodes: Dict[int, 'Node'] = {}
+
+    def node_of_code(self, code) -> 'Node':
+        node = self._nodes.get(code)
+        if node is None:
+            i = self._index[code]
+            node = Node(depth=self.depth, word_ids=self.sorted_ids[self.bounds[i]:self.bounds[i + 1]],
+                        hint_matrix=self.hint_matrix)
+            self._nodes[code] = node
+        return node
+
+    def size_of_code(self, code) -> int:
+        """
+        The number of words in the child for `code`, without creating it
+        """
+        i = self._index[code]
+        return int(self.bounds[i + 1] - self.bounds[i])
+
+    def __getitem__(self, hint) -> 'Node':
+        return self.node_of_code(hints.encode_hint(hint))
+
+    def __contains__(self, hint):
+        return hints.encode_hint(hint) in self._index
+
+    def __iter__(self):
+        length = self.hint_matrix.word_length
+        return (hints.decode_hint(int(code), length) for code in self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['hint_matrix']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.hint_matrix = hints.get_hint_matrix()
+
+
 class Node:
-    def __init__(self, remaining_words=None, depth=0):
-        self.remaining_words = remaining_words
-        if remaining_words is None:
-            self.remaining_words = words.get_words()
+    """
+    A game state: the answers still consistent with the hints so far.
+
+    The remaining answers are held as an int32 array of word ids: ids in the
+    hint matrix's answer `WordStore`, which are also its columns.
+    `remaining_words` materializes them as strings.
+
+    :param hint_matrix: the word lists and hints to play with (default: the
+        active dictionary's, see `words.set_dictionary`)
+    """
+    def __init__(self, remaining_words=None, depth=0, word_ids=None, hint_matrix=None):
+        self.hint_matrix = hints.get_hint_matrix() if hint_matrix is None else hint_matrix
+        if word_ids is None:
+            if remaining_words is None:
+                word_ids = np.arange(len(self.hint_matrix.answers), dtype=np.int32)
+            else:
+                word_ids = self.hint_matrix.ids_of_answers(remaining_words)
+        self.word_ids = word_ids
         self.depth=depth
         self.children = {}
+        self.checkpoint_file = None
+        self._fingerprint = None
+
+    @property
+    def remaining_words(self) -> List[str]:
+        answers = self.hint_matrix.answers
+        return [answers[i] for i in self.word_ids]
+
+    @property
+    def fingerprint(self) -> bytes:
+        if self._fingerprint is None:
+            self._fingerprint = state_fingerprint(self.word_ids, self.hint_matrix.key.encode('ascii'))
+        return self._fingerprint
+
+    def partition(self, guess) -> Dict[int, np.ndarray]:
+        """
+        Split the remaining words by the hint `guess` would produce.
+
+        :return: a map from hint code to the positions (into `word_ids`)
+            of the words that produce that hint
+        """
+        order, unique_codes, bounds = self._sorted_partition(guess)
+        return {int(code): order[bounds[i]:bounds[i + 1]] for i, code in enumerate(unique_codes)}
+
+    def _sorted_partition(self, guess) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the positions of the remaining words stably sorted by the
+        hint `guess` gives them, the distinct hint codes in order, and the
+        bounds of each code's run
+        """
+        codes = self.hint_matrix.hint_codes(guess, self.word_ids)
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        if len(codes) == 0:
+            return order, sorted_codes, np.zeros(1, dtype=np.int64)
+        starts = np.flatnonzero(np.diff(sorted_codes)) + 1
+        bounds = np.concatenate(([0], starts, [len(codes)]))
+        return order, sorted_codes[bounds[:-1]], bounds
 
     def apply_guess_to_remaining_words(self, guess):
+        answers = self.hint_matrix.answers
         hints_to_wordset = {}
-        for w in self.remaining_words:
-            hint = get_hint_for_word_from_guess(w, guess)
-            hints_to_wordset.setdefault(hint, [])
-            hints_to_wordset[hint].append(w)
+        for code, positions in self.partition(guess).items():
+            hints_to_wordset[hints.decode_hint(code, self.hint_matrix.word_length)] = \
+                [answers[i] for i in self.word_ids[positions]]
         return hints_to_wordset
 
-        
     def compute_guess_entropies(self, guesses=None) -> List[Tuple[str, float]]:
         if guesses is None:
-            guesses = words.get_words()
-        # Find max entropy wordset
-        result = []
-        for guess in guesses:
-            hints_to_wordset = self.apply_guess_to_remaining_words(guess)
-            wordsets = list(hints_to_wordset.values())
-            H = entropy_of_wordsets(wordsets)
-            result.append((guess, H))
-        
-        return result
-
-    def max_entropy_guesses(self, n=1) -> List[Tuple[str, float]]:
-        entropy_guesses = self.compute_guess_entropies()
-        entropy_guesses.sort(key=lambda x: x[1], reverse=True)
-        return entropy_guesses[:n]
+            guesses = self.hint_matrix.guesses
+        guess_ids = np.fromiter((self.hint_matrix.guess_ids[g] for g in guesses), dtype=np.int32, count=len(guesses))
+        entropies = scoring.guess_entropies(self.hint_matrix, self.word_ids, guess_ids)
+        return list(zip(guesses, entropies.tolist()))
+
+    def max_entropy_guesses(self, n=1, prune=True, guess_ids=None, sampler=None) -> List[Tuple[str, float]]:
+        """
+        Return the `n` guesses with the highest entropy over the remaining
+        words. With `prune`, equivalent guesses are scored once and scoring
+        stops early when the top `n` is settled; the result is the same.
+
+        :param guess_ids: only consider these guesses (default: all), e.g.
+            the legal guesses from `guessmodes.legal_guess_ids`
+        :param sampler: a `sampling.Sampler` to pick the top guesses from
+            sampled estimates on large nodes (default: score exactly)
+        """
+        restriction = None if guess_ids is None else state_fingerprint(guess_ids)
+        key = (self.fingerprint, n, restriction, None if sampler is None else sampler.key)
+        cached = TRANSPOSITIONS.get(key)
+        if cached is None:
+            if sampler is not None:
+                entropies, _ = sampler.guess_entropies(self.hint_matrix, self.word_ids, n=n, guess_ids=guess_ids)
+            elif prune:
+                entropies, _ = scoring.pruned_guess_entropies(self.hint_matrix, self.word_ids, n=n,
+                                                              guess_ids=guess_ids)
+            else:
+                entropies = scoring.guess_entropies(self.hint_matrix, self.word_ids, guess_ids)
+            guesses = self.hint_matrix.guesses
+            if guess_ids is not None:
+                guesses = [guesses[i] for i in guess_ids]
+            cached = scoring.top_n(guesses, entropies, n=n)
+            TRANSPOSITIONS.put(key, cached)
+        return list(cached)
     
     def make_max_entropy_guesses(self, n=1):
         guesses_and_entropies = self.max_entropy_guesses(n=n)
@@ -68,16 +280,40 @@ class Node:
             self.play(guess)
         return guesses_and_entropies
 
-    def play(self, guess) -> Dict[Tuple[int], 'Node']:
-        new_depth = self.depth + 1
-        hints_to_wordsets = self.apply_guess_to_remaining_words(guess)
-        hints_to_nodes = {h: Node(ws, new_depth) for (h, ws) in hints_to_wordsets.items()}
-        self.children[guess] = hints_to_nodes
+    def play(self, guess) -> Children:
+        """
+        Return the children of this node for `guess`, a lazy map from hint
+        to `Node`; only the children that are accessed are created
+        """
+        if guess not in self.children:
+            order, codes, bounds = self._sorted_partition(guess)
+            self.children[guess] = Children(self.word_ids[order], codes, bounds, self.depth + 1, self.hint_matrix)
         return self.children[guess]
 
-    def populate(self, up_to_depth=6, debug_up_to_depth=1):
+    def populate(self, up_to_depth=6, debug_up_to_depth=1, checkpoint_dir=None, checkpoint_depth=1, path=()):
+        """
+        Expand the max-entropy game tree below this node up to `up_to_depth`.
+
+        With `checkpoint_dir`, every subtree rooted at `checkpoint_depth` is
+        pickled there as soon as it is complete and its children are freed;
+        they are reloaded on access. Rerunning populate with the same
+        directory skips subtrees that were already checkpointed, so an
+        interrupted population resumes where it stopped.
+
+        :param path: the `(guess, hint_code)` pairs leading to this node;
+            used to name checkpoint files
+        """
         start = '   ' * self.depth
         debug=self.depth <= debug_up_to_depth
+        checkpoint = checkpoint_dir is not None and self.depth == checkpoint_depth
+        if checkpoint:
+            checkpoint_file = checkpoint_path(checkpoint_dir, path, self.hint_matrix)
+            if os.path.exists(checkpoint_file):
+                if debug:
+                    print(f"{start}Resuming from checkpoint {checkpoint_file}")
+                self.children = {}
+                self.checkpoint_file = checkpoint_file
+                return
         if debug:
             print(f"{start}Populating node (depth={self.depth}) with {len(self)} words")
         if self.depth >= up_to_depth:
@@ -89,16 +325,41 @@ class Node:
             if debug:
                 print(f"{start}guess={guess}")
             num_nodes = len(hints_to_nodes)
-            for i, node in enumerate(hints_to_nodes.values()):
+            for i, (hint, node) in enumerate(hints_to_nodes.items()):
                 if debug:
                     print(f"{start}node {i} of {num_nodes}")
-                node.populate()
-        
+                node.populate(up_to_depth, debug_up_to_depth, checkpoint_dir, checkpoint_depth,
+                              path + ((guess, hints.encode_hint(hint)),))
+
+        if checkpoint:
+            save_checkpoint(self, checkpoint_file)
+            self.children = {}
+            self.checkpoint_file = checkpoint_file
+
+    def load_checkpoint(self):
+        """
+        Reload children that `populate` freed after checkpointing them
+        """
+        if self.checkpoint_file is not None and not self.children:
+            self.children = load_checkpoint(self.checkpoint_file).children
+        return self.children
+
+    def __getstate__(self):
+        # The hint matrix is shared and memory-mapped; never pickle it
+        state = dict(self.__dict__)
+        del state['hint_matrix']
+        state['_fingerprint'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.hint_matrix = hints.get_hint_matrix()
+
     def __len__(self):
-        return len(self.remaining_words)
+        return len(self.word_ids)
 
     def __getitem__(self, x):
-        return self.children[x]
+        return self.load_checkpoint()[x]
 
     def __str__(self):
         return f""
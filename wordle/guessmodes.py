@@ -0,0 +1,65 @@
+"""
+Restrictions on which words may be guessed.
+
+- 'all': any word in the guess list (the default);
+- 'hard': Wordle's hard mode, where every revealed hint must be reused:
+  greens stay in place and each green or yellow letter appears at least as
+  often as it was revealed;
+- 'candidates': only words that could still be the answer.
+
+Legal guesses are computed as guess ids, from the letter bitsets of the
+guess list for hard mode and from the node's remaining word ids for
+candidates, so restricting the guesses also shrinks the scoring work.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import gametree as gt
+import hints
+from hints import HIT, CLOSE, HintMatrix
+
+GUESS_MODES = ('all', 'hard', 'candidates')
+
+
+def hard_mode_mask(index, history: List[Tuple[str, Tuple[int, ...]]]) -> np.ndarray:
+    """
+    Return the bitset of words in `index` that are legal hard mode guesses
+    after `history`, a list of `(guess, hint)` pairs
+    """
+    mask = ~index.empty
+    for guess, hint in history:
+        found = {}
+        for i, (let, status) in enumerate(zip(guess, hint)):
+            if status == HIT:
+                mask = mask & index.position_mask(let, i)
+            if status in (HIT, CLOSE):
+                found[let] = found.get(let, 0) + 1
+        for let, k in found.items():
+            mask = mask & index.at_least_mask(let, k)
+    return mask
+
+
+def is_legal_guess(guess, history, mode='all', node: Optional[gt.Node] = None) -> bool:
+    if mode == 'hard':
+        m = hints.get_hint_matrix() if node is None else node.hint_matrix
+        return guess in m.guess_ids and bool(hard_mode_mask(m.guess_index, history)[m.guess_ids[guess]])
+    if mode == 'candidates':
+        return guess in node.remaining_words
+    return True
+
+
+def legal_guess_ids(node: gt.Node, history, mode='all') -> Optional[np.ndarray]:
+    """
+    Return the ids of the guesses allowed at `node` after `history`, or None
+    if every guess is allowed
+    """
+    if mode == 'all':
+        return None
+    m: HintMatrix = node.hint_matrix
+    if mode == 'hard':
+        return np.flatnonzero(hard_mode_mask(m.guess_index, history)).astype(np.int32)
+    if mode == 'candidates':
+        ids = m.answer_guess_ids[node.word_ids]
+        return ids[ids >= 0]
+    raise ValueError(f"Unknown guess mode {mode}")
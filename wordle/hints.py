@@ -0,0 +1,397 @@
+"""
+Hint scoring, shared by the game, the solver and the CLI.
+
+A hint is encoded as a base-3 integer where position i contributes
+`hint[i] * 3**i`, so every 5-letter hint fits in a uint8 (0-242); longer
+words use the smallest unsigned type that holds `3**length` codes (see
+`hint_dtype`). Repeated letters are scored as in Wordle: greens are matched
+first, then each remaining guess letter is yellow only while the target
+still has an unmatched copy of it, left to right.
+
+`hint_code` scores a single pair; `HintMatrix` precomputes every
+(guess, answer) pair with the vectorized `compute_hint_matrix`, or computes
+blocks of it on demand when the full matrix would be too large.
+"""
+import hashlib
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import words
+
+HIT = 2
+CLOSE = 1
+MISS = 0
+
+WORD_LENGTH = 5
+NUM_HINTS = 3 ** WORD_LENGTH
+
+# Hint matrices larger than this are not precomputed; their hint codes are
+# computed a block of guesses at a time instead
+MAX_MATRIX_BYTES = 1 << 30
+
+# Bump whenever the hint encoding or matrix layout changes so stale cache
+# files are ignored
+CACHE_VERSION = 2
+
+
+def num_hints(length=WORD_LENGTH) -> int:
+    return 3 ** length
+
+
+def win_code(length=WORD_LENGTH) -> int:
+    return 3 ** length - 1
+
+
+def hint_dtype(length=WORD_LENGTH) -> np.dtype:
+    """
+    The smallest unsigned integer type holding every hint code for words of
+    `length` letters
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if num_hints(length) <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    raise ValueError(f"Words of {length} letters are too long to encode hints for")
+
+
+def hint_code(target, guess) -> int:
+    """
+    Score `guess` against `target` and return the packed hint code
+    """
+    code = 0
+    weight = 1
+    if len(set(guess)) == len(guess):
+        # Without repeated guess letters every present letter is yellow
+        for tc, gc in zip(target, guess):
+            if tc == gc:
+                code += HIT * weight
+            elif gc in target:
+                code += CLOSE * weight
+            weight *= 3
+        return code
+
+    unmatched = {}
+    for tc, gc in zip(target, guess):
+        if tc != gc:
+            unmatched[tc] = unmatched.get(tc, 0) + 1
+    for tc, gc in zip(target, guess):
+        if tc == gc:
+            code += HIT * weight
+        elif unmatched.get(gc, 0) > 0:
+            unmatched[gc] -= 1
+            code += CLOSE * weight
+        weight *= 3
+    return code
+
+
+def hint_tuple(target, guess) -> Tuple[int, ...]:
+    """
+    Score `guess` against `target` and return the hint as a tuple for display
+    """
+    return decode_hint(hint_code(target, guess), len(guess))
+
+
+def encode_hint(hint) -> int:
+    """
+    Pack a hint tuple such as (2, 0, 1, 0, 0) into its base-3 code
+    """
+    code = 0
+    for i, status in enumerate(hint):
+        code += status * 3 ** i
+    return code
+
+
+def decode_hint(code, length=WORD_LENGTH) -> Tuple[int, ...]:
+    """
+    Unpack a base-3 hint code into a hint tuple
+    """
+    code = int(code)
+    result = []
+    for _ in range(length):
+        result.append(code % 3)
+        code //= 3
+    return tuple(result)
+
+
+def _distinct_letter_codes(block: np.ndarray, a_letters: np.ndarray, a_masks: np.ndarray, dtype) -> np.ndarray:
+    """
+    Hint codes for guesses without repeated letters, where every letter the
+    answer contains is at least yellow
+    """
+    codes = np.zeros((len(block), len(a_letters)), dtype=dtype)
+    for i in range(block.shape[1]):
+        g = block[:, i, None]
+        hit = g == a_letters[None, :, i]
+        present = (a_masks[None, :] >> g) & 1
+        # A hit is also present, so this is HIT, CLOSE or MISS
+        status = present.astype(dtype) + hit
+        codes += status * dtype.type(3 ** i)
+    return codes
+
+
+def _repeated_letter_codes(block: np.ndarray, a_letters: np.ndarray, dtype) -> np.ndarray:
+    """
+    Hint codes for guesses with repeated letters: a non-green guess letter is
+    yellow only if the answer has more unmatched copies of it than the
+    guess used up at earlier non-green positions
+    """
+    length = block.shape[1]
+    codes = np.zeros((len(block), len(a_letters)), dtype=dtype)
+    hits = [block[:, i, None] == a_letters[None, :, i] for i in range(length)]
+    for i in range(length):
+        g = block[:, i, None]
+        available = np.zeros(codes.shape, dtype=np.int8)
+        for j in range(length):
+            available += (a_letters[None, :, j] == g) & ~hits[j]
+        for k in range(i):
+            available -= (block[:, k, None] == g) & ~hits[k]
+        close = ~hits[i] & (available > 0)
+        codes += (hits[i] * dtype.type(HIT) + close * dtype.type(CLOSE)) * dtype.type(3 ** i)
+    return codes
+
+
+class HintKernel:
+    """
+    Computes the hint codes of any guesses against a fixed set of answers
+
+    :param answer_letters: the `(N, length)` uint8 letters of the answers
+    """
+    def __init__(self, answer_letters: np.ndarray):
+        self.a_letters = answer_letters.astype(np.int32) - ord('a')
+        self.dtype = hint_dtype(answer_letters.shape[1])
+        # Bit k of a_masks[j] is set when answer j contains letter k
+        self.a_masks = np.zeros(len(answer_letters), dtype=np.int32)
+        for i in range(answer_letters.shape[1]):
+            self.a_masks |= np.int32(1) << self.a_letters[:, i]
+
+    def codes(self, guess_letters: np.ndarray) -> np.ndarray:
+        """
+        Return the `(len(guess_letters), N)` hint codes of the guesses with
+        the given letters
+        """
+        g_letters = guess_letters.astype(np.int32) - ord('a')
+        ordered = np.sort(g_letters, axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        codes = np.empty((len(g_letters), len(self.a_letters)), dtype=self.dtype)
+        if not repeated.all():
+            codes[~repeated] = _distinct_letter_codes(g_letters[~repeated], self.a_letters, self.a_masks, self.dtype)
+        if repeated.any():
+            codes[repeated] = _repeated_letter_codes(g_letters[repeated], self.a_letters, self.dtype)
+        return codes
+
+
+def compute_hint_matrix(guesses: List[str], answers: List[str], block_size=256) -> np.ndarray:
+    """
+    Compute the hint code for each guess against each answer.
+
+    :param guesses: words that may be guessed (rows)
+    :param answers: words that may be the target (columns)
+    :param block_size: number of guess rows computed per vectorized step
+    :return: a `(len(guesses), len(answers))` array of hint codes, of type
+        `hint_dtype` for the word length
+    """
+    g_letters = words.letter_array(guesses)
+    kernel = HintKernel(words.letter_array(answers, g_letters.shape[1]))
+    matrix = np.empty((len(guesses), len(answers)), dtype=kernel.dtype)
+    # Scoring guesses grouped by whether they repeat letters keeps each
+    # block on a single kernel
+    repeated = np.array([len(set(g)) != len(g) for g in guesses], dtype=bool)
+    for rows in (np.flatnonzero(~repeated), np.flatnonzero(repeated)):
+        for start in range(0, len(rows), block_size):
+            block_rows = rows[start:start + block_size]
+            matrix[block_rows] = kernel.codes(g_letters[block_rows])
+    return matrix
+
+
+class StreamedColumns:
+    """
+    The hint codes of every guess against some answers, computed when rows
+    are requested rather than stored: `columns[guess_ids]` returns the
+    `(len(guess_ids), N)` codes, like indexing rows of a precomputed matrix
+    """
+    def __init__(self, guess_letters: np.ndarray, answer_letters: np.ndarray):
+        self.guess_letters = guess_letters
+        self.kernel = HintKernel(answer_letters)
+        self.shape = (len(guess_letters), len(answer_letters))
+
+    def __getitem__(self, guess_ids) -> np.ndarray:
+        return self.kernel.codes(self.guess_letters[guess_ids])
+
+
+def word_list_hash(guesses: List[str], answers: List[str]) -> str:
+    h = hashlib.sha1()
+    h.update('\n'.join(guesses).encode('ascii'))
+    h.update(b'\0')
+    h.update('\n'.join(answers).encode('ascii'))
+    return h.hexdigest()[:16]
+
+
+def cache_path(guesses: List[str], answers: List[str], cache_dir=None) -> str:
+    if cache_dir is None:
+        cache_dir = words.WORDFILES_DIR
+    return os.path.join(cache_dir, f"hints.v{CACHE_VERSION}.{word_list_hash(guesses, answers)}.npy")
+
+
+def load_or_compute_hint_matrix(guesses: List[str], answers: List[str], cache_dir=None) -> np.ndarray:
+    """
+    Load the hint matrix for these word lists from the on-disk cache,
+    computing and saving it first if no cache file exists.
+
+    The cache is memory-mapped read-only, so loading is nearly free and
+    processes using the same cache share its pages. If the cache can't be
+    written the freshly computed matrix is returned as is.
+    """
+    path = cache_path(guesses, answers, cache_dir)
+    if os.path.exists(path):
+        matrix = np.load(path, mmap_mode='r')
+        if matrix.shape == (len(guesses), len(answers)) and matrix.dtype == hint_dtype(len(guesses[0])):
+            return matrix
+    matrix = compute_hint_matrix(guesses, answers)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return matrix
+    return np.load(path, mmap_mode='r')
+
+
+class HintMatrix:
+    """
+    The full guess x answer matrix of hint codes, computed once.
+
+    Rows are indexed by guess, columns by answer: the ids of the guess and
+    answer `words.WordStore`s. `guesses`/`answers`, `guess_ids`/`answer_ids`
+    and `guess_letters`/`answer_letters` are those stores' words, ids and
+    letters. When the answers are the guesses (the default) both are the
+    same store, so answer ids are guess ids.
+
+    If the matrix would take more than `max_bytes` (default
+    `MAX_MATRIX_BYTES`) it isn't stored: `matrix` is None and `columns`
+    computes hint codes a block of guesses at a time instead.
+
+    :param guesses: a `WordStore` or list of words (default: the active
+        dictionary's store)
+    :param answers: likewise (default: the guesses)
+    """
+    def __init__(self, guesses=None, answers=None, use_cache=True, max_bytes=None):
+        self.guess_store = self._store_of(guesses)
+        self.answer_store = self.guess_store if answers is None else self._store_of(answers)
+        self.guesses: List[str] = self.guess_store.words
+        self.answers: List[str] = self.answer_store.words
+        self.guess_ids: Dict[str, int] = self.guess_store.ids
+        self.answer_ids: Dict[str, int] = self.answer_store.ids
+        self.guess_letters = self.guess_store.letters
+        self.answer_letters = self.answer_store.letters
+        self.word_length = self.guess_store.word_length
+        self.num_hints = num_hints(self.word_length)
+        self.win_code = win_code(self.word_length)
+        self.dtype = hint_dtype(self.word_length)
+        # Identifies the word lists, so state keys from different matrices
+        # never collide
+        self.key = word_list_hash(self.guesses, self.answers)
+        if max_bytes is None:
+            max_bytes = MAX_MATRIX_BYTES
+        self.streamed = len(self.guesses) * len(self.answers) * self.dtype.itemsize > max_bytes
+        if self.streamed:
+            self.matrix = None
+        elif use_cache:
+            self.matrix = load_or_compute_hint_matrix(self.guesses, self.answers)
+        else:
+            self.matrix = compute_hint_matrix(self.guesses, self.answers)
+        self._guess_index = None
+        self._answer_guess_ids = None
+
+    @staticmethod
+    def _store_of(ws) -> words.WordStore:
+        if ws is None:
+            return words.get_word_store()
+        if isinstance(ws, words.WordStore):
+            return ws
+        return words.WordStore(ws)
+
+    @property
+    def guess_index(self) -> words.WordIndex:
+        """
+        Letter bitsets over the guesses, indexed by guess id (the word list's
+        own index when the guesses are the word list)
+        """
+        if self._guess_index is None:
+            if self.guess_store is words.get_word_store():
+                self._guess_index = words.get_word_index()
+            else:
+                self._guess_index = words.WordIndex(self.guess_store)
+        return self._guess_index
+
+    @property
+    def answer_guess_ids(self) -> np.ndarray:
+        """
+        The guess id of each answer, or -1 if the answer isn't a guess
+        """
+        if self._answer_guess_ids is None:
+            if self.answer_store is self.guess_store:
+                self._answer_guess_ids = self.answer_store.all_ids()
+            else:
+                self._answer_guess_ids = np.fromiter((self.guess_ids.get(w, -1) for w in self.answers),
+                                                     dtype=np.int32, count=len(self.answers))
+        return self._answer_guess_ids
+
+    def columns(self, answer_ids):
+        """
+        Return the hint codes of every guess against the answers in
+        `answer_ids`, as an array (or `StreamedColumns`) whose rows are
+        selected by guess ids
+        """
+        if self.matrix is None:
+            return StreamedColumns(self.guess_letters, self.answer_letters[answer_ids])
+        return self.matrix[:, answer_ids]
+
+    def row(self, guess) -> np.ndarray:
+        """
+        Return the hint codes of `guess` against every answer
+        """
+        if self.matrix is None:
+            return HintKernel(self.answer_letters).codes(self.guess_letters[[self.guess_ids[guess]]])[0]
+        return self.matrix[self.guess_ids[guess]]
+
+    def code(self, guess, answer) -> int:
+        """
+        Look up the hint code of `guess` against `answer`
+        """
+        if self.matrix is None:
+            return hint_code(answer, guess)
+        return int(self.matrix[self.guess_ids[guess], self.answer_ids[answer]])
+
+    def hint_codes(self, guess, answer_ids) -> np.ndarray:
+        """
+        Return the hint codes of `guess` against the answers in `answer_ids`
+        """
+        if self.matrix is None:
+            return self.columns(answer_ids)[[self.guess_ids[guess]]][0]
+        return self.row(guess)[answer_ids]
+
+    def ids_of_answers(self, ws) -> np.ndarray:
+        return self.answer_store.ids_of(ws)
+
+    def __len__(self):
+        return len(self.guesses)
+
+
+_HINT_MATRIX = None
+_HINT_MATRIX_DICTIONARY = None
+
+
+def get_hint_matrix() -> HintMatrix:
+    """
+    Return the hint matrix over the active dictionary's words (see
+    `words.set_dictionary`), building it on first use
+    """
+    global _HINT_MATRIX, _HINT_MATRIX_DICTIONARY
+    if _HINT_MATRIX is None or _HINT_MATRIX_DICTIONARY != words.get_dictionary():
+        _HINT_MATRIX = HintMatrix()
+        _HINT_MATRIX_DICTIONARY = words.get_dictionary()
+    return _HINT_MATRIX
@@ -0,0 +1,150 @@
+"""
+Multi-board games (Dordle, Quordle, Octordle): every guess is played on
+several boards at once, each with its own target, and the game is won when
+every board is solved.
+
+`Boards` keeps one `gametree.Node` per unsolved board. Candidate guesses are
+scored by their summed entropy across the unsolved boards in a single
+batched pass (`scoring.multi_board_entropies`), a played guess's hint row is
+read once and split per board, and solved boards drop out of both.
+"""
+import random
+from typing import List, Optional, Tuple
+
+import gametree as gt
+import hints
+import scoring
+from hints import decode_hint, hint_code, win_code
+from words import default_first_words, get_random_word, is_valid_word
+
+
+class MultiWordle:
+    """
+    A game with one target per board. The default guess limit follows
+    Quordle: five more than the number of boards.
+    """
+    def __init__(self, targets=None, num_boards=4, max_guesses=None):
+        if targets is None:
+            targets = [get_random_word() for _ in range(num_boards)]
+        self.targets = list(targets)
+        self.max_guesses = len(self.targets) + 5 if max_guesses is None else max_guesses
+        self.guesses = []
+        self.solved = [False] * len(self.targets)
+
+    def guess(self, guess) -> List[Optional[Tuple[int, ...]]]:
+        """
+        Play `guess` on every board and return the hint of each, or None for
+        boards solved by an earlier guess
+        """
+        if not is_valid_word(guess):
+            raise RuntimeError(f"Invalid Word: {guess}")
+        if not self.is_running():
+            raise RuntimeError("Game over")
+        result = []
+        for i, target in enumerate(self.targets):
+            if self.solved[i]:
+                result.append(None)
+                continue
+            code = hint_code(target, guess)
+            self.solved[i] = code == win_code(len(target))
+            result.append(decode_hint(code, len(guess)))
+        self.guesses.append((guess, result))
+        return result
+
+    @property
+    def game_won(self):
+        return all(self.solved)
+
+    def is_running(self):
+        return len(self.guesses) < self.max_guesses and not self.game_won
+
+
+class Boards:
+    """
+    The remaining words of each board; `nodes[i]` is None once board `i`
+    is solved
+    """
+    def __init__(self, num_boards=4, nodes=None):
+        if nodes is None:
+            root = gt.Node()
+            nodes = [root] * num_boards
+        self.nodes: List[Optional[gt.Node]] = nodes
+        self.hint_matrix = hints.get_hint_matrix()
+
+    def active(self) -> List[int]:
+        return [i for i, node in enumerate(self.nodes) if node is not None]
+
+    def max_entropy_guesses(self, n=1) -> List[Tuple[str, float]]:
+        """
+        Return the `n` guesses with the highest entropy summed over the
+        unsolved boards
+        """
+        boards = [self.nodes[i].word_ids for i in self.active()]
+        entropies = scoring.multi_board_entropies(self.hint_matrix, boards)
+        return scoring.top_n(self.hint_matrix.guesses, entropies, n=n)
+
+    def next_guess(self, n=1, verbose=False) -> str:
+        """
+        Guess the last word of a board down to one word, if any (it solves
+        that board for certain); otherwise pick among the top `n` guesses
+        by summed entropy
+        """
+        singles = [self.nodes[i].remaining_words[0] for i in self.active() if len(self.nodes[i]) == 1]
+        if singles:
+            if verbose:
+                print(f"  - Applying only remaining word of a board '{singles[0]}'")
+            return singles[0]
+        guesses = self.max_entropy_guesses(n=n)
+        if verbose:
+            print(f"  - Potential guesses: {', '.join([f'{_g}: {_h:4.2f}' for _g, _h in guesses])}")
+        return random.choice(guesses)[0]
+
+    def play(self, guess, board_hints: List[Optional[Tuple[int, ...]]]) -> 'Boards':
+        """
+        Return the boards after `guess` produced `board_hints`; boards the
+        guess solved become None
+        """
+        row = self.hint_matrix.row(guess)
+        nodes = []
+        for node, hint in zip(self.nodes, board_hints):
+            if node is None or hint is None:
+                nodes.append(None)
+                continue
+            code = hints.encode_hint(hint)
+            if code == self.hint_matrix.win_code:
+                nodes.append(None)
+                continue
+            ids = node.word_ids[row[node.word_ids] == code]
+            nodes.append(gt.Node(depth=node.depth + 1, word_ids=ids, hint_matrix=self.hint_matrix))
+        return Boards(nodes=nodes)
+
+    def __len__(self):
+        return len(self.active())
+
+
+def solve_multi(game: MultiWordle, first_words=None, n=1, verbose=False):
+    """
+    Solve a multi-board game by maximizing summed entropy over the unsolved
+    boards
+
+    :return: `(guesses, won, path)`, where `path` holds `(guess, hints,
+        remaining word counts)` with None for solved boards
+    """
+    if first_words is None:
+        first_words = default_first_words()
+    boards = Boards(len(game.targets))
+    path = []
+    while game.is_running():
+        if verbose:
+            sizes = ', '.join('-' if node is None else str(len(node)) for node in boards.nodes)
+            print(f"- Round {len(game.guesses) + 1}: words remaining per board: {sizes}")
+        if any(len(boards.nodes[i]) == 0 for i in boards.active()):
+            raise RuntimeError("No more guesses")
+        if len(game.guesses) < len(first_words):
+            g = first_words[len(game.guesses)]
+        else:
+            g = boards.next_guess(n=n, verbose=verbose)
+        board_hints = game.guess(g)
+        boards = boards.play(g, board_hints)
+        path.append((g, board_hints, [None if node is None else len(node) for node in boards.nodes]))
+    return len(game.guesses), game.game_won, path
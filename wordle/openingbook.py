@@ -0,0 +1,93 @@
+"""
+Opening books: precomputed best second guesses.
+
+For an opener, the book maps every hint the opener can produce to the top
+max-entropy second guesses for the words left by that hint. Books are
+generated offline into `wordfiles/openingbook.<opener>.json` and loaded on
+first use, so turn two costs a dictionary lookup.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import gametree as gt
+import hints
+import words
+
+BOOK_SIZE = 5
+
+# Loaded books by opener and dictionary, so switching dictionaries (see
+# `words.set_dictionary`) never reuses a book built for other words
+_BOOKS: Dict[Tuple[str, tuple], Optional[Dict[int, List[Tuple[str, float]]]]] = {}
+
+
+def book_path(opener) -> str:
+    return os.path.join(words.WORDFILES_DIR, f"openingbook.{opener}.json")
+
+
+def _book_key() -> dict:
+    m = hints.get_hint_matrix()
+    return {"hints_version": hints.CACHE_VERSION, "words_hash": hints.word_list_hash(m.guesses, m.answers)}
+
+
+def compile_opening_book(opener, size=BOOK_SIZE, verbose=False) -> Dict[int, List[Tuple[str, float]]]:
+    """
+    Compute the top `size` second guesses for each hint `opener` can produce
+    """
+    book = {}
+    children = gt.Node().play(opener)
+    for i, (hint, node) in enumerate(children.items()):
+        if verbose:
+            print(f"[{i + 1}/{len(children)}] {hint}: {len(node)} words")
+        if len(node) == 1:
+            book[hints.encode_hint(hint)] = [(node.remaining_words[0], 0.0)]
+        else:
+            book[hints.encode_hint(hint)] = node.max_entropy_guesses(n=size)
+    return book
+
+
+def save_opening_book(opener, book, path=None):
+    if path is None:
+        path = book_path(opener)
+    data = dict(_book_key(), opener=opener,
+                book={str(code): [[g, h] for g, h in guesses] for code, guesses in sorted(book.items())})
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def load_opening_book(opener, path=None) -> Optional[Dict[int, List[Tuple[str, float]]]]:
+    """
+    Load the book for `opener`, or return None if there is none or it was
+    built for a different word list or hint encoding
+    """
+    if path is None:
+        path = book_path(opener)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    key = _book_key()
+    if any(data.get(k) != v for k, v in key.items()) or data.get("opener") != opener:
+        return None
+    return {int(code): [(g, h) for g, h in guesses] for code, guesses in data["book"].items()}
+
+
+def get_opening_book(opener):
+    key = (opener, words.get_dictionary())
+    if key not in _BOOKS:
+        _BOOKS[key] = load_opening_book(opener)
+    return _BOOKS[key]
+
+
+def second_guesses(opener, hint, n=1) -> Optional[List[Tuple[str, float]]]:
+    """
+    Return the top `n` second guesses after `opener` produced `hint`, or
+    None if the book can't answer (no book, or `n` exceeds its size)
+    """
+    book = get_opening_book(opener)
+    if book is None:
+        return None
+    guesses = book.get(hints.encode_hint(hint))
+    if guesses is None or (n > len(guesses) and len(guesses) != 1):
+        return None
+    return guesses[:n]
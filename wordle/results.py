@@ -0,0 +1,121 @@
+"""
+Streaming game results and incremental statistics for large batch runs.
+
+Each finished game is written to disk as soon as it completes, with any
+`Node` references reduced to remaining-word counts, and folded into
+`RunningStats`. Memory stays flat however many games are played, and an
+interrupted run keeps every game written so far.
+"""
+import csv
+import json
+from collections import Counter
+
+from hints import encode_hint
+
+
+def _remaining(x) -> int:
+    return x if isinstance(x, int) else len(x)
+
+
+def compact_run(run):
+    """
+    Reduce a `(word, guesses, won, path)` run to plain data: the path
+    becomes `(guess, hint, remaining_words)` triples without the root entry
+    """
+    word, guesses, won, path = run
+    return word, guesses, won, [(g, tuple(h), _remaining(x)) for (g, h, x) in path if g]
+
+
+class ResultWriter:
+    """
+    Append game results to a JSON Lines (default) or CSV file, flushing
+    after every game
+    """
+    def __init__(self, path, fmt=None):
+        if fmt is None:
+            fmt = 'csv' if path.endswith('.csv') else 'jsonl'
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unknown result format {fmt}")
+        self.fmt = fmt
+        self.f = open(path, 'a', newline='')
+        self.csv = None
+        if fmt == 'csv':
+            self.csv = csv.writer(self.f)
+            if self.f.tell() == 0:
+                self.csv.writerow(['word', 'guesses', 'won', 'path'])
+
+    def write(self, run):
+        word, guesses, won, path = compact_run(run)
+        if self.csv is not None:
+            self.csv.writerow([word, guesses, int(won), ' '.join(f"{g}:{encode_hint(h)}:{r}" for g, h, r in path)])
+        else:
+            self.f.write(json.dumps({"word": word, "guesses": guesses, "won": won, "path": path}) + '\n')
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RunningStats:
+    """
+    Win/loss counts and guess-count statistics maintained one game at a time.
+    The mean is a running sum; median and mode come from a histogram of
+    guess counts, so nothing grows with the number of games except the list
+    of lost words.
+    """
+    def __init__(self):
+        self.runs = 0
+        self.wins = 0
+        self.total_guesses = 0
+        self.histogram = Counter()
+        self.losses = []
+
+    def add(self, run):
+        word, guesses, won = run[0], run[1], run[2]
+        self.runs += 1
+        self.total_guesses += guesses
+        self.histogram[guesses] += 1
+        if won:
+            self.wins += 1
+        else:
+            self.losses.append(word)
+
+    def mean(self):
+        return self.total_guesses / self.runs
+
+    def _nth(self, i):
+        seen = 0
+        for guesses in sorted(self.histogram):
+            seen += self.histogram[guesses]
+            if seen > i:
+                return guesses
+
+    def median(self):
+        mid = self.runs // 2
+        if self.runs % 2 == 1:
+            return self._nth(mid)
+        return (self._nth(mid - 1) + self._nth(mid)) / 2
+
+    def mode(self):
+        # Ties go to the guess count seen first, as with statistics.mode
+        return max(self.histogram, key=self.histogram.get)
+
+    def report(self):
+        no_losses = self.runs - self.wins
+        print("Lost on the following words:")
+        for word in self.losses:
+            print("    ", word)
+        print(f"Runs: {self.runs}")
+        print(f"Wins: {self.wins} ({100 * self.wins / self.runs}%)    Losses: {no_losses} ({100 * no_losses / self.runs}%)")
+        print(f"Num Guesses")
+        print(f"    Min:    {min(self.histogram)}")
+        print(f"    Max:    {max(self.histogram)}")
+        print(f"    Mean:   {self.mean()}")
+        print(f"    Median: {self.median()}")
+        print(f"    Mode:   {self.mode()}")
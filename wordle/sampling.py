@@ -0,0 +1,176 @@
+"""
+Approximate entropy scoring from samples of the remaining answers, for the
+root and other large nodes where exact scoring of every guess is slow.
+
+A guess's entropy is estimated from the partition it induces on a uniform
+random sample of the answers:
+
+- the plug-in estimate is biased low by about (K - 1) / 2m for K hints seen
+  in a sample of m answers, so that is added back (Miller-Madow);
+- its standard error is sqrt(Var[log p(hint)] / m), with a finite
+  population correction since answers are sampled without replacement.
+
+A pilot sample of `min_sample` answers gives the variance of the leading
+guesses' estimates, and the sample grows to the size that brings them
+within `error` at the given confidence. If that would take more than
+`max_fraction` of the answers, sampling can't pay off and every guess is
+scored exactly instead. Otherwise guesses are then cut by successive
+halving: each round keeps the better half by estimate (dropping any guess
+confidently below the n-th best), and doubles the sample for the survivors.
+The last `finalists` are scored exactly, so the returned entropies are
+exact and only the choice of finalists is approximate.
+
+Samples are nested prefixes of one permutation of the answers, seeded by
+`seed` and the answers themselves, so a node's result doesn't depend on
+what was scored before it.
+"""
+import zlib
+from statistics import NormalDist
+from typing import List, Tuple
+
+import numpy as np
+
+import scoring
+from hints import HintMatrix
+
+
+class Sampler:
+    """
+    :param error: target half-width of the leading guesses' confidence
+        intervals, in the units of the entropies (nats)
+    :param confidence: confidence level of those intervals
+    :param min_sample: answers in the first sample
+    :param finalists: guesses left for exact scoring (at least `n`)
+    :param min_words: nodes with fewer answers are scored exactly
+    :param max_fraction: score exactly when the error bound needs a sample
+        larger than this fraction of the answers
+    :param seed: seed for the samples
+    """
+    def __init__(self, error=0.1, confidence=0.95, min_sample=256, finalists=32, min_words=1000, max_fraction=0.5,
+                 seed=0):
+        if error <= 0 or not 0 < confidence < 1:
+            raise ValueError("error must be positive and confidence between 0 and 1")
+        self.error = error
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.min_sample = min_sample
+        self.finalists = finalists
+        self.min_words = min_words
+        self.max_fraction = max_fraction
+        self.seed = seed
+
+    @property
+    def key(self) -> tuple:
+        """
+        The settings, for cache keys
+        """
+        return (self.error, self.confidence, self.min_sample, self.finalists, self.min_words, self.max_fraction,
+                self.seed)
+
+    def sample_order(self, answer_ids: np.ndarray) -> np.ndarray:
+        rng = np.random.default_rng([self.seed, zlib.crc32(np.ascontiguousarray(answer_ids).tobytes())])
+        return rng.permutation(len(answer_ids))
+
+    def sample_size(self, standard_error, size, population) -> int:
+        """
+        The sample size at which an estimate with `standard_error` from a
+        sample of `size` answers would be within the error bound
+        """
+        variance = standard_error ** 2 * size * (population - 1) / (population - size)
+        bound = (self.error / self.z) ** 2
+        return int(np.ceil(variance * population / (bound * (population - 1) + variance)))
+
+    def estimate(self, hint_matrix: HintMatrix, sample_ids, guess_ids, population, block_size=128
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimate each guess's entropy over `population` answers from the
+        answers in `sample_ids`
+
+        :return: the estimates and their standard errors
+        """
+        # Counts don't depend on column order, and sorted columns are
+        # gathered faster
+        sample_ids = np.sort(sample_ids)
+        matrix = hint_matrix.matrix
+        # Gather the guesses' sampled codes once: just those cells of a
+        # precomputed matrix, or just the sampled columns of a streamed one
+        if matrix is None:
+            columns, rows_of = hint_matrix.columns(sample_ids), guess_ids
+        else:
+            columns, rows_of = matrix[np.ix_(guess_ids, sample_ids)], np.arange(len(guess_ids))
+        m = len(sample_ids)
+        estimates = np.empty(len(guess_ids), dtype=np.float64)
+        errors = np.empty(len(guess_ids), dtype=np.float64)
+        for start in range(0, len(guess_ids), block_size):
+            counts = scoring.hint_counts(columns[rows_of[start:start + block_size]], hint_matrix.num_hints)
+            H = scoring.entropies_of_counts(counts)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_p = np.where(counts > 0, np.log(np.maximum(counts, 1) / m), 0.0)
+            variance = np.maximum((counts * log_p ** 2).sum(axis=1) / m - H ** 2, 0.0)
+            seen = np.count_nonzero(counts, axis=1)
+            end = start + len(counts)
+            estimates[start:end] = H + (seen - 1) / (2 * m)
+            errors[start:end] = np.sqrt(variance / m * (population - m) / max(population - 1, 1))
+        return estimates, errors
+
+    @staticmethod
+    def _exact(hint_matrix: HintMatrix, answer_ids, n, guess_ids) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        entropies, _ = scoring.pruned_guess_entropies(hint_matrix, answer_ids, n=n, guess_ids=guess_ids)
+        return entropies, [(len(answer_ids), len(guess_ids))]
+
+    def guess_entropies(self, hint_matrix: HintMatrix, answer_ids, n=1, guess_ids=None
+                        ) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        """
+        Score guesses like `scoring.pruned_guess_entropies`: the finalists
+        get their exact entropies and every other guess gets -inf, so
+        `scoring.top_n` of the result picks among the finalists.
+
+        :param guess_ids: score only these guesses (default: all), in this order
+        :return: the entropies and the `(sample size, guesses)` of each
+            round, ending with the exact round over all answers
+        """
+        if guess_ids is None:
+            guess_ids = np.arange(len(hint_matrix.guesses))
+        population = len(answer_ids)
+        if population < self.min_words:
+            return self._exact(hint_matrix, answer_ids, n, guess_ids)
+
+        # Score one guess of each equivalent group (see `canonical_guesses`)
+        keys = scoring.canonical_guesses(hint_matrix.guess_letters[guess_ids], hint_matrix.answer_letters[answer_ids])
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        reps = guess_ids[first]
+        finalists = max(self.finalists, n)
+        order = self.sample_order(answer_ids)
+        survivors = np.arange(len(reps))
+        rounds = []
+
+        # Grow the sample until the leading guesses are within the error bound
+        size = min(self.min_sample, population)
+        while size < population:
+            estimates, errors = self.estimate(hint_matrix, answer_ids[order[:size]], reps, population)
+            leaders = np.argsort(-estimates, kind='stable')[:finalists]
+            if self.z * errors[leaders].max() <= self.error:
+                break
+            size = min(max(2 * size, self.sample_size(errors[leaders].max(), size, population)), population)
+            if size > self.max_fraction * population:
+                # Sampling would read most answers and then score exactly anyway
+                return self._exact(hint_matrix, answer_ids, n, guess_ids)
+
+        while size < population and len(survivors) > finalists:
+            rounds.append((size, len(survivors)))
+            ranked = np.argsort(-estimates, kind='stable')
+            kept = ranked[:max(finalists, (len(ranked) + 1) // 2)]
+            # Also drop guesses whose upper bound is below the n-th best's lower bound
+            nth = ranked[min(n, len(ranked)) - 1]
+            kept = kept[estimates[kept] + self.z * errors[kept] >= estimates[nth] - self.z * errors[nth]]
+            survivors = survivors[np.sort(kept)]
+            size = min(2 * size, population)
+            if size < population:
+                estimates, errors = self.estimate(hint_matrix, answer_ids[order[:size]], reps[survivors],
+                                                  population)
+
+        rounds.append((population, len(survivors)))
+        group_entropies = np.full(len(reps), -np.inf)
+        group_entropies[survivors] = scoring.guess_entropies(hint_matrix, answer_ids, reps[survivors])
+        entropies = group_entropies[inverse] if len(guess_ids) else np.empty(0)
+        return entropies, rounds
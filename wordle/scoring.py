@@ -0,0 +1,200 @@
+"""
+Batched entropy scoring of candidate guesses.
+
+All candidate guesses for a node are scored in one pass over the hint
+matrix: hint codes are counted per guess row with a single bincount and the
+entropy of every row is computed at once.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from hints import HintMatrix, NUM_HINTS
+
+
+def hint_counts(rows: np.ndarray, num_hints=NUM_HINTS) -> np.ndarray:
+    """
+    Count how many answers produce each hint, for each row of hint codes.
+
+    :param rows: a `(B, N)` array of hint codes
+    :return: a `(B, num_hints)` array of counts
+    """
+    offsets = np.arange(len(rows), dtype=np.int64)[:, None] * num_hints
+    flat = (rows + offsets).ravel()
+    return np.bincount(flat, minlength=len(rows) * num_hints).reshape(len(rows), num_hints)
+
+
+def entropies_of_counts(counts: np.ndarray, base=None) -> np.ndarray:
+    """
+    Compute -sum(p * log(p)) over each row of hint counts.
+
+    This is evaluated as log(N) - sum(c * log(c)) / N, so a partition into
+    singletons scores exactly log(N) whatever the order of its bins.
+    """
+    totals = counts.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c_log_c = np.where(counts > 1, counts * np.log(np.maximum(counts, 1)), 0.0)
+        H = np.log(totals) - c_log_c.sum(axis=1) / totals
+    if base is not None:
+        H /= np.log(base)
+    return H
+
+
+def answer_columns(hint_matrix: HintMatrix, answer_ids):
+    """
+    Return the hint matrix restricted to the columns in `answer_ids`; rows
+    are selected by indexing with guess ids (see `HintMatrix.columns`)
+    """
+    matrix = hint_matrix.matrix
+    # Counts don't depend on column order, so every column can be used as is
+    if matrix is not None and len(answer_ids) == matrix.shape[1]:
+        return matrix
+    return hint_matrix.columns(answer_ids)
+
+
+def guess_entropies(hint_matrix: HintMatrix, answer_ids, guess_ids=None, block_size=128, base=None) -> np.ndarray:
+    """
+    Score each candidate guess by the entropy of the partition it induces
+    on the answers in `answer_ids`.
+
+    :param hint_matrix: the precomputed hint matrix
+    :param answer_ids: column ids of the remaining answers
+    :param guess_ids: row ids of the candidate guesses (default: all guesses)
+    :param block_size: number of guess rows scored per step
+    :return: an array of entropies aligned with `guess_ids`
+    """
+    matrix = answer_columns(hint_matrix, answer_ids)
+    if guess_ids is None:
+        guess_ids = np.arange(matrix.shape[0])
+    result = np.empty(len(guess_ids), dtype=np.float64)
+    for start in range(0, len(guess_ids), block_size):
+        rows = matrix[guess_ids[start:start + block_size]]
+        result[start:start + len(rows)] = entropies_of_counts(hint_counts(rows, hint_matrix.num_hints), base=base)
+    return result
+
+
+def multi_board_entropies(hint_matrix: HintMatrix, boards: List[np.ndarray], guess_ids=None,
+                          block_size=128) -> np.ndarray:
+    """
+    Score each candidate guess by the sum of its entropies over several
+    boards, each with its own remaining answers.
+
+    All boards are scored in one pass: each block of guess rows is read once
+    with the columns of every board side by side, and the codes of board `b`
+    are offset by `b` times the number of hints so one bincount counts every
+    board.
+
+    :param boards: the answer ids remaining on each board (all non-empty)
+    :param guess_ids: row ids of the candidate guesses (default: all guesses)
+    :return: an array of summed entropies aligned with `guess_ids`
+    """
+    if guess_ids is None:
+        guess_ids = np.arange(len(hint_matrix.guesses))
+    columns = np.concatenate(boards)
+    # Guesses equivalent on the union of the boards' answers are equivalent
+    # on each board, so score one of each
+    keys = canonical_guesses(hint_matrix.guess_letters[guess_ids], hint_matrix.answer_letters[columns])
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    all_guess_ids, guess_ids = guess_ids, guess_ids[first]
+    num_hints = hint_matrix.num_hints
+    offsets = np.repeat(np.arange(len(boards), dtype=np.int64) * num_hints, [len(b) for b in boards])
+    # Gather every board's columns at once unless that would be larger than
+    # the matrix itself (e.g. several boards near the root)
+    matrix = hint_matrix.matrix
+    gathered = matrix is None or len(columns) <= matrix.shape[1]
+    if gathered:
+        matrix = hint_matrix.columns(columns)
+    # Bins for (row in block, board, hint), so one bincount counts the block
+    bins = num_hints * len(boards)
+    offsets = np.arange(block_size, dtype=np.int64)[:, None] * bins + offsets
+    result = np.empty(len(guess_ids), dtype=np.float64)
+    for start in range(0, len(guess_ids), block_size):
+        rows = matrix[guess_ids[start:start + block_size]]
+        if not gathered:
+            rows = rows[:, columns]
+        flat = (rows + offsets[:len(rows)]).ravel()
+        counts = np.bincount(flat, minlength=len(rows) * bins).reshape(-1, num_hints)
+        result[start:start + len(rows)] = entropies_of_counts(counts).reshape(len(rows), len(boards)).sum(axis=1)
+    return result[inverse].reshape(len(all_guess_ids))
+
+
+def canonical_guesses(guess_letters: np.ndarray, answer_letters: np.ndarray) -> np.ndarray:
+    """
+    Key each guess by its letters with every letter absent from all answers
+    blanked out. An absent letter is a miss against every answer, so guesses
+    with equal keys induce identical partitions of these answers.
+
+    :param guess_letters: `(G, L)` uint8 letters of the candidate guesses
+    :param answer_letters: `(N, L)` uint8 letters of the remaining answers
+    :return: a key per guess (an int64 for words of up to 12 letters)
+    """
+    present = np.zeros(256, dtype=bool)
+    present[answer_letters.ravel()] = True
+    # Letters become 1-26 (0 when blanked), 5 bits each
+    canon = np.where(present[guess_letters], guess_letters - (ord('a') - 1), 0)
+    if canon.shape[1] > 12:
+        # Too long for an int64: key by the raw bytes instead
+        canon = np.ascontiguousarray(canon, dtype=np.uint8)
+        return canon.view(np.dtype((np.void, canon.shape[1]))).ravel()
+    keys = np.zeros(len(guess_letters), dtype=np.int64)
+    for i in range(canon.shape[1]):
+        keys = keys * 32 + canon[:, i]
+    return keys
+
+
+def pruned_guess_entropies(hint_matrix: HintMatrix, answer_ids, n=1, block_size=128,
+                           guess_ids=None) -> Tuple[np.ndarray, int]:
+    """
+    Score all guesses like `guess_entropies`, but skip work that can't change
+    the top `n`:
+
+    - guesses with the same canonical key (see `canonical_guesses`) induce
+      the same partition, so only the first of each is scored;
+    - no guess can beat log(N) when N answers remain and N is at most the
+      number of distinct hints, so once `n` guesses in the scanned prefix
+      reach that bound, later guesses could at best tie and lose the tie on
+      order, and scanning stops.
+
+    Guesses that were never scored get -inf, so `top_n` of the result is
+    identical to `top_n` of the exhaustive scores.
+
+    :param guess_ids: score only these guesses (default: all), in this order
+
+    :return: the entropies and the number of guess rows actually scored
+    """
+    if guess_ids is None:
+        guess_ids = np.arange(len(hint_matrix.guesses))
+    num_guesses = len(guess_ids)
+    keys = canonical_guesses(hint_matrix.guess_letters[guess_ids], hint_matrix.answer_letters[answer_ids])
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    # Scan groups in order of their first guess
+    order = np.argsort(first)
+    reps = first[order]
+    group_of_rank = np.empty(len(order), dtype=np.int64)
+    group_of_rank[order] = np.arange(len(order))
+    rank_of_guess = group_of_rank[inverse]
+
+    bound = np.log(len(answer_ids)) if len(answer_ids) <= hint_matrix.num_hints else np.inf
+    matrix = answer_columns(hint_matrix, answer_ids)
+    group_entropies = np.full(len(reps), -np.inf)
+    scored = 0
+    for start in range(0, len(reps), block_size):
+        rows = matrix[guess_ids[reps[start:start + block_size]]]
+        group_entropies[start:start + len(rows)] = entropies_of_counts(hint_counts(rows, hint_matrix.num_hints))
+        scored = start + len(rows)
+        if scored < len(reps):
+            # Guesses before the next unscored group's first guess are all scored
+            frontier = reps[scored]
+            at_bound = group_entropies[rank_of_guess[:frontier]] >= bound
+            if np.count_nonzero(at_bound) >= n:
+                break
+    entropies = group_entropies[rank_of_guess] if num_guesses else np.empty(0)
+    return entropies, scored
+
+
+def top_n(guesses: List[str], entropies: np.ndarray, n=1) -> List[Tuple[str, float]]:
+    """
+    Return the `n` highest-entropy guesses; ties keep their original order
+    """
+    order = np.argsort(-entropies, kind='stable')[:n]
+    return [(guesses[i], float(entropies[i])) for i in order]
@@ -0,0 +1,202 @@
+"""
+Optimal-strategy search: choose the guess minimizing the expected (or
+worst-case) number of guesses, rather than maximizing entropy.
+
+The search is a depth-limited minimization over `gametree.Node` states:
+
+- costs are summed over the remaining words, so a state with n words costs
+  n for the guess made there plus the cost of each hint bucket it leaves
+  (`expected`), or 1 plus the worst bucket (`worst`);
+- candidate guesses are the top few by entropy, tried in that order;
+- a cheap lower bound on each bucket (2n - 1 guesses in total, since at most
+  one word can be solved by the next guess) prunes candidates that can't
+  beat the best found so far;
+- subproblem results are memoized by remaining-word fingerprint;
+- with a `guess_mode` (see `guessmodes`), only guesses legal after the
+  hints so far are tried, at the root and along every searched line;
+- a per-move time budget stops the search, keeping the best guess found.
+"""
+import time
+from math import inf
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import gametree as gt
+import guessmodes
+import scoring
+from hints import decode_hint
+
+MODES = ('expected', 'worst')
+
+SEARCH_MEMO = gt.TranspositionTable()
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def lower_bound(n, mode='expected'):
+    """
+    A lower bound on the cost of solving n words
+    """
+    if n == 0:
+        return 0
+    if mode == 'worst':
+        return 1 if n == 1 else 2
+    return 2 * n - 1
+
+
+class Searcher:
+    """
+    Branch-and-bound search for the cost-minimizing guess.
+
+    :param mode: 'expected' minimizes the total (hence mean) guesses over
+        the remaining words; 'worst' minimizes the guesses for the worst word
+    :param breadth: number of highest-entropy guesses tried at each state
+    :param time_budget: seconds allowed per move (None for no limit)
+    :param guess_mode: the guess restriction (see `guessmodes.GUESS_MODES`)
+    """
+    def __init__(self, mode='expected', breadth=5, time_budget=5.0, memo=None, guess_mode='all'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode {mode}")
+        if guess_mode not in guessmodes.GUESS_MODES:
+            raise ValueError(f"Unknown guess mode {guess_mode}")
+        self.guess_mode = guess_mode
+        self.mode = mode
+        self.breadth = breadth
+        self.time_budget = time_budget
+        self.memo = SEARCH_MEMO if memo is None else memo
+        self.deadline = None
+        self.nodes_searched = 0
+
+    def candidates(self, node: gt.Node, guess_ids=None) -> List[str]:
+        """
+        The top `breadth` guesses by entropy among `guess_ids` (default:
+        all guesses), followed by the best of the remaining words themselves
+        (which can win immediately, and are legal in every guess mode)
+        """
+        m = node.hint_matrix
+        result = [g for g, _ in node.max_entropy_guesses(n=self.breadth, guess_ids=guess_ids)]
+        in_set = [m.guess_ids[w] for w in node.remaining_words if w in m.guess_ids]
+        if in_set:
+            guess_ids = np.array(in_set, dtype=np.int32)
+            entropies = scoring.guess_entropies(m, node.word_ids, guess_ids)
+            for i in np.argsort(-entropies, kind='stable')[:self.breadth]:
+                g = m.guesses[guess_ids[i]]
+                if g not in result:
+                    result.append(g)
+        return result
+
+    def cost(self, node: gt.Node, depth_left, bound=inf, history=()) -> Tuple[float, Optional[str]]:
+        """
+        Return `(cost, guess)` for solving `node`, reached by the `(guess,
+        hint)` pairs in `history`, within `depth_left` guesses. If the cost
+        is at least `bound` the search may stop early and return a lower
+        bound with no guess.
+        """
+        n = len(node)
+        if n == 0:
+            return 0, None
+        if depth_left <= 0:
+            return inf, None
+        if n == 1:
+            return 1, node.remaining_words[0]
+        if depth_left == 1:
+            return inf, None
+        lb = lower_bound(n, self.mode)
+        if lb >= bound:
+            return lb, None
+
+        guess_ids = guessmodes.legal_guess_ids(node, history, self.guess_mode)
+        restriction = None if guess_ids is None else gt.state_fingerprint(guess_ids)
+        key = (node.fingerprint, depth_left, self.mode, self.breadth, restriction)
+        cached = self.memo.get(key)
+        if cached is not None:
+            value, guess, exact = cached
+            if exact or value >= bound:
+                return value, guess
+
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        self.nodes_searched += 1
+
+        best, best_guess = bound, None
+        for guess in self.candidates(node, guess_ids):
+            value = self._guess_cost(node, guess, depth_left, best, history)
+            if value < best:
+                best, best_guess = value, guess
+        exact = best_guess is not None
+        if not exact:
+            best = max(best, lb)
+        self.memo.put(key, (best, best_guess, exact))
+        return best, best_guess
+
+    def _guess_cost(self, node: gt.Node, guess, depth_left, bound, history=()) -> float:
+        """
+        The cost of playing `guess` at `node`, or any value >= `bound` if
+        it can't beat `bound`
+        """
+        n = len(node)
+        m = node.hint_matrix
+        parts = node.partition(guess)
+        if len(parts) == 1 and m.win_code not in parts:
+            return inf
+        children = sorted(((len(p), node.word_ids[p], c) for c, p in parts.items() if c != m.win_code),
+                          key=lambda t: t[0], reverse=True)
+        child_depth = node.depth + 1
+        if self.mode == 'worst':
+            worst = 1
+            for size, ids, code in children:
+                if 1 + lower_bound(size, 'worst') >= bound:
+                    return bound
+                value, _ = self.cost(gt.Node(depth=child_depth, word_ids=ids, hint_matrix=m), depth_left - 1, bound - 1,
+                                     self._child_history(history, guess, code, m))
+                worst = max(worst, 1 + value)
+                if worst >= bound:
+                    return worst
+            return worst
+
+        total = n + sum(lower_bound(size) for size, _, _ in children)
+        if total >= bound:
+            return total
+        for size, ids, code in children:
+            lb = lower_bound(size)
+            value, _ = self.cost(gt.Node(depth=child_depth, word_ids=ids, hint_matrix=m), depth_left - 1,
+                                 bound - (total - lb), self._child_history(history, guess, code, m))
+            total += value - lb
+            if total >= bound:
+                return total
+        return total
+
+    def _child_history(self, history, guess, code, m) -> tuple:
+        # Only hard mode legality depends on the hints along the way
+        if self.guess_mode != 'hard':
+            return history
+        return tuple(history) + ((guess, decode_hint(code, m.word_length)),)
+
+    def best_guess(self, node: gt.Node, depth_left=gt.MAX_GUESSES, history=()) -> Tuple[str, float]:
+        """
+        Return the best guess at `node`, reached by the `(guess, hint)`
+        pairs in `history`, and its cost (total guesses over the remaining
+        words in 'expected' mode, worst-case guesses in 'worst' mode). If
+        the time budget runs out, the best guess found so far is returned,
+        or the top entropy guess if none was completed.
+        """
+        if len(node) == 1:
+            return node.remaining_words[0], 1
+        self.deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        best, best_guess = inf, None
+        guess_ids = guessmodes.legal_guess_ids(node, history, self.guess_mode)
+        try:
+            for guess in self.candidates(node, guess_ids):
+                value = self._guess_cost(node, guess, depth_left, best, history)
+                if value < best:
+                    best, best_guess = value, guess
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        if best_guess is None:
+            best_guess = node.max_entropy_guesses(n=1, guess_ids=guess_ids)[0][0]
+        return best_guess, best
@@ -0,0 +1,287 @@
+"""
+An asyncio service answering "game state -> best guesses" requests for many
+concurrent games.
+
+Requests and responses are JSON objects, one per line, read from stdin (the
+default) or from clients of a local socket:
+
+    {"id": 1, "history": [["tares", "BYBBG"]], "n": 3, "guess_mode": "all"}
+    {"id": 1, "guesses": [["lined", 5.9], ...], "remaining": 82}
+
+A hint is a string of G/Y/B letters (as in `ai.interactive`), a list of hint
+statuses or a hint code. Errors are reported as `{"id": ..., "error": ...}`.
+Responses may come back out of order; `id` is echoed to match them up.
+
+All clients share the nodes of recently reached states in a bounded LRU,
+so a state reached by several games is only partitioned once while it stays
+cached, and memory doesn't grow with the number of distinct histories
+clients send. Answers are cached by canonical constraints (see
+`constraints`), so histories that reveal the same facts share them.
+Concurrent requests for the same state are coalesced into one computation,
+finished results are kept in a transposition table, and the entropy scoring
+runs in a pool of worker processes.
+
+    python service.py --workers 4
+    python service.py --socket /tmp/wordle.sock
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import constraints
+import gametree as gt
+import guessmodes
+import hints
+import openingbook
+import words
+
+_FEEDBACK = {'G': hints.HIT, 'Y': hints.CLOSE, 'B': hints.MISS}
+
+
+class RequestError(Exception):
+    pass
+
+
+def parse_hint(hint, length=hints.WORD_LENGTH) -> Tuple[int, ...]:
+    if isinstance(hint, int):
+        if not 0 <= hint < hints.num_hints(length):
+            raise RequestError(f"Invalid hint code {hint}")
+        return hints.decode_hint(hint, length)
+    if isinstance(hint, str):
+        try:
+            hint = [_FEEDBACK[c] for c in hint.upper()]
+        except KeyError:
+            raise RequestError(f"Invalid feedback {hint!r}: use G, Y and B")
+    hint = tuple(hint)
+    if len(hint) != length or any(h not in (hints.HIT, hints.CLOSE, hints.MISS) for h in hint):
+        raise RequestError(f"Invalid hint {list(hint)}")
+    return hint
+
+
+def _init_worker(dictionary, max_matrix_bytes):
+    words.set_dictionary(*dictionary)
+    hints.MAX_MATRIX_BYTES = max_matrix_bytes
+    hints.get_hint_matrix()
+
+
+def _score(word_ids, n, guess_ids) -> List[Tuple[str, float]]:
+    """
+    Pool worker: the top `n` guesses over `word_ids`
+    """
+    return gt.Node(word_ids=word_ids).max_entropy_guesses(n=n, guess_ids=guess_ids)
+
+
+class SolverService:
+    """
+    :param workers: worker processes scoring guesses (default: all CPU
+        cores; 0 scores in a background thread of this process)
+    :param max_n: the largest number of guesses a request may ask for
+    :param max_nodes: the most nodes kept for reuse across requests
+    """
+    def __init__(self, workers=None, max_n=20, max_nodes=2_000):
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        hints.get_hint_matrix()
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                initargs=(words.get_dictionary(), hints.MAX_MATRIX_BYTES))
+        else:
+            self.executor = ThreadPoolExecutor(1)
+        self.max_n = max_n
+        self.root = gt.Node()
+        self.nodes = gt.TranspositionTable(max_size=max_nodes)
+        self.results = gt.TranspositionTable()
+        self.states = gt.TranspositionTable()
+        self.pending: Dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.computed = 0
+
+    def node_of(self, history) -> gt.Node:
+        """
+        Walk from the root along `history`. Nodes are looked up in (and
+        added to) the `nodes` LRU rather than cached on their parents with
+        `Node.play`, so the tree kept between requests stays bounded.
+        """
+        node = self.root
+        for guess, hint in history:
+            key = (node.fingerprint, guess, hint)
+            child = self.nodes.get(key)
+            if child is None:
+                m = node.hint_matrix
+                ids = node.word_ids[m.hint_codes(guess, node.word_ids) == hints.encode_hint(hint)]
+                if len(ids) == 0:
+                    raise RequestError(f"No words give {list(hint)} for {guess!r} at this point")
+                child = gt.Node(depth=node.depth + 1, word_ids=ids, hint_matrix=m)
+                self.nodes.put(key, child)
+            node = child
+        return node
+
+    async def best_guesses(self, history, n=1, guess_mode='all') -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Return the top `n` guesses after `history` (a list of `(guess,
+        hint)` pairs) and the number of words remaining
+        """
+        self.requests += 1
+        for guess, _ in history:
+            if guess not in self.root.hint_matrix.guess_ids:
+                raise RequestError(f"Invalid guess {guess!r}")
+        # States reached before along any path are answered from the
+        # constraint cache without touching the tree
+        state_key = (constraints.Constraints.from_history(history, self.root.hint_matrix.word_length).key,
+                     n, guess_mode)
+        cached = self.states.get(state_key)
+        if cached is not None:
+            return cached
+        result = await self._best_guesses(history, n, guess_mode)
+        self.states.put(state_key, result)
+        return result
+
+    async def _best_guesses(self, history, n, guess_mode) -> Tuple[List[Tuple[str, float]], int]:
+        node = self.node_of(history)
+        if len(node) == 0:
+            raise RequestError("No words remaining")
+        if len(node) == 1:
+            return [(node.remaining_words[0], 0.0)], 1
+        if len(history) == 1 and guess_mode == 'all':
+            book = openingbook.second_guesses(history[0][0], history[0][1], n=n)
+            if book is not None:
+                return book, len(node)
+
+        guess_ids = guessmodes.legal_guess_ids(node, history, guess_mode)
+        key = (node.fingerprint, n, None if guess_ids is None else gt.state_fingerprint(guess_ids))
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached, len(node)
+        future = self.pending.get(key)
+        if future is None:
+            # The first request for this state computes it; concurrent ones
+            # wait on the same future
+            future = asyncio.get_running_loop().run_in_executor(self.executor, _score, node.word_ids, n, guess_ids)
+            self.pending[key] = future
+            self.computed += 1
+            try:
+                result = await future
+                self.results.put(key, result)
+            finally:
+                del self.pending[key]
+            return result, len(node)
+        return await asyncio.shield(future), len(node)
+
+    async def handle(self, request: dict) -> dict:
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Request must be a JSON object")
+            n = request.get("n", 1)
+            if not isinstance(n, int) or not 1 <= n <= self.max_n:
+                raise RequestError(f"n must be an integer from 1 to {self.max_n}")
+            guess_mode = request.get("guess_mode", "all")
+            if guess_mode not in guessmodes.GUESS_MODES:
+                raise RequestError(f"Unknown guess mode {guess_mode!r}")
+            length = self.root.hint_matrix.word_length
+            history = [(str(guess).lower(), parse_hint(hint, length)) for guess, hint in request.get("history", [])]
+            guesses, remaining = await self.best_guesses(history, n=n, guess_mode=guess_mode)
+            response.update(guesses=[[g, h] for g, h in guesses], remaining=remaining)
+        except (RequestError, TypeError, ValueError) as e:
+            response["error"] = str(e)
+        except Exception as e:
+            response["error"] = f"Internal error: {e!r}"
+        return response
+
+    async def serve_lines(self, readline, write):
+        """
+        Answer each JSON line returned by the coroutine `readline`
+        concurrently, passing response lines to the coroutine `write`
+        """
+        async def answer(line):
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"id": None, "error": f"Invalid JSON: {e}"}
+            else:
+                response = await self.handle(request)
+            await write(json.dumps(response) + '\n')
+
+        tasks = set()
+        while True:
+            line = await readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.ensure_future(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def serve_stdio(self):
+        loop = asyncio.get_running_loop()
+
+        # stdin may be a file rather than a pipe, so read it in a thread
+        async def readline():
+            return await loop.run_in_executor(None, sys.stdin.readline)
+
+        async def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        await self.serve_lines(readline, write)
+
+    async def serve_socket(self, path):
+        async def client(reader, writer):
+            async def write(text):
+                writer.write(text.encode())
+                await writer.drain()
+
+            try:
+                await self.serve_lines(reader.readline, write)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(client, path, limit=1 << 20, backlog=1024)
+        print(f"Serving on {path}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--socket", default=None, metavar="PATH", help="Serve on a Unix socket instead of stdin")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker processes (default: all cores; 0 scores in a thread)")
+    parser.add_argument("--dictionary", default=None, metavar="PATH",
+                        help="Word file to play with, or the name of one in wordfiles/ (default: the Wordle words)")
+    parser.add_argument("--word_length", type=int, default=words.WORD_LENGTH, help="Length of the words to play with")
+    parser.add_argument("--max_matrix_mb", type=float, default=None,
+                        help="Largest hint matrix to precompute; bigger word lists compute hints as they are scored")
+    args = parser.parse_args()
+    if args.dictionary is not None or args.word_length != words.WORD_LENGTH:
+        words.set_dictionary(args.dictionary, args.word_length)
+    if args.max_matrix_mb is not None:
+        hints.MAX_MATRIX_BYTES = int(args.max_matrix_mb * 2 ** 20)
+
+    service = SolverService(workers=args.workers)
+    try:
+        if args.socket is not None:
+            if os.path.exists(args.socket):
+                os.remove(args.socket)
+            asyncio.run(service.serve_socket(args.socket))
+        else:
+            asyncio.run(service.serve_stdio())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        print(f"Answered {service.requests} requests with {service.computed} computations", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Precompiled max-entropy strategies.
+
+A strategy maps every reachable game state to the guess to play next. A
+state is identified by the hint codes received so far: the guesses are
+implied by the strategy itself, so the codes alone determine the remaining
+words. Strategies are compiled offline from an opening word and saved as a
+small .npz file, so playing a turn is a single dictionary lookup.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import gametree as gt
+import hints
+
+STRATEGY_VERSION = 2
+# Pads hint-code paths in the saved key array; never a valid hint code
+_PAD = 255
+
+
+def _key(codes) -> bytes:
+    return bytes(codes)
+
+
+class Strategy:
+    """
+    A lookup table from hint-code paths to guesses.
+
+    `moves[key]` is the guess to play after receiving the hint codes in
+    `key` (as bytes); `moves[b'']` is the opener.
+    """
+    def __init__(self, moves: Dict[bytes, str], opener: str, words_hash: str):
+        self.moves = moves
+        self.opener = opener
+        self.words_hash = words_hash
+
+    def next_guess(self, history: List[Tuple[str, int]]) -> Optional[str]:
+        """
+        Return the guess this strategy plays after `history`, a list of
+        `(guess, hint_code)` pairs, or None if the game has left the
+        strategy (e.g., a different guess was played).
+        """
+        codes = []
+        for guess, code in history:
+            if self.moves.get(_key(codes)) != guess:
+                return None
+            codes.append(code)
+        return self.moves.get(_key(codes))
+
+    def save(self, path):
+        items = sorted(self.moves.items())
+        guess_list = sorted(set(self.moves.values()))
+        guess_ids = {g: i for i, g in enumerate(guess_list)}
+        keys = np.full((len(items), gt.MAX_GUESSES), _PAD, dtype=np.uint8)
+        for i, (key, _) in enumerate(items):
+            keys[i, :len(key)] = np.frombuffer(key, dtype=np.uint8)
+        np.savez_compressed(path,
+                            version=np.array(STRATEGY_VERSION),
+                            hints_version=np.array(hints.CACHE_VERSION),
+                            opener=np.array(self.opener),
+                            words_hash=np.array(self.words_hash),
+                            guess_list=np.array(guess_list),
+                            keys=keys,
+                            guesses=np.array([guess_ids[g] for _, g in items], dtype=np.uint16))
+
+    def __len__(self):
+        return len(self.moves)
+
+
+def load_strategy(path) -> Strategy:
+    data = np.load(path)
+    if int(data['version']) != STRATEGY_VERSION:
+        raise RuntimeError(f"Unsupported strategy version {int(data['version'])} in {path}")
+    if int(data['hints_version']) != hints.CACHE_VERSION:
+        raise RuntimeError(f"Strategy {path} was compiled with a different hint encoding")
+    words_hash = str(data['words_hash'])
+    m = hints.get_hint_matrix()
+    if words_hash != hints.word_list_hash(m.guesses, m.answers):
+        raise RuntimeError(f"Strategy {path} was compiled for a different word list")
+    guess_list = [str(g) for g in data['guess_list']]
+    moves = {}
+    for key, guess_id in zip(data['keys'], data['guesses']):
+        moves[bytes(key[key != _PAD])] = guess_list[guess_id]
+    return Strategy(moves, str(data['opener']), words_hash)
+
+
+def compile_strategy(opener='tares', max_guesses=gt.MAX_GUESSES, verbose=False) -> Strategy:
+    """
+    Build the full max-entropy decision tree starting from `opener`.
+
+    Children are explored depth first and released once their moves are
+    recorded, so only one root-to-leaf path of nodes is alive at a time.
+    """
+    m = hints.get_hint_matrix()
+    if m.num_hints > _PAD:
+        raise ValueError("Strategies store hint codes as bytes, so words can have at most 5 letters")
+    moves = {}
+
+    def visit(node: gt.Node, codes: List[int]):
+        if len(codes) == 0:
+            guess = opener
+        elif len(node) == 1:
+            guess = node.remaining_words[0]
+        else:
+            guess = node.max_entropy_guesses(n=1)[0][0]
+        moves[_key(codes)] = guess
+        if verbose and len(codes) <= 1:
+            print(f"{'   ' * len(codes)}{guess}: {len(node)} words")
+        if len(codes) + 1 >= max_guesses:
+            return
+        for hint, child in node.play(guess).items():
+            code = hints.encode_hint(hint)
+            if code != m.win_code:
+                visit(child, codes + [code])
+        node.children.clear()
+
+    visit(gt.Node(), [])
+    return Strategy(moves, opener, hints.word_list_hash(m.guesses, m.answers))
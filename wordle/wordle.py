@@ -1,8 +1,5 @@
 from words import get_random_word, is_valid_word
-
-HIT = 2
-CLOSE = 1
-MISS = 0
+from hints import HIT, CLOSE, MISS, hint_code, decode_hint, win_code
 
 class Wordle:
 
@@ -20,21 +17,11 @@ class Wordle:
         if len(self.guesses) >= self.max_guesses:
             raise RuntimeError("Game over")
 
-        game_won = True
-        hint = []
-        for (i, let) in enumerate(guess):
-            if self.word[i] == let:
-                hint.append(HIT)
-            elif let in self.word:
-                hint.append(CLOSE)
-                game_won = False
-            else:
-                hint.append(MISS)
-                game_won = False
-
-        self.game_won = game_won
+        code = hint_code(self.word, guess)
+        hint = decode_hint(code, len(guess))
+        self.game_won = code == win_code(len(self.word))
         self.guesses.append((guess, hint))
-        return tuple(hint)
+        return hint
 
     def is_running(self):
         return len(self.guesses) < self.max_guesses and not self.game_won
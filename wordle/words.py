@@ -1,17 +1,20 @@
+import os
 import random
 from string import ascii_lowercase
 
+import numpy as np
+
 
 def get_words():
-    return list(_WORDS)
+    return list(_load_words())
 
 
 def get_random_word():
-    return random.choice(_WORDS)
+    return random.choice(_load_words())
 
 
 def is_valid_word(word):
-    return word in _WORDS_SET
+    return word in _load_word_set()
 
 
 def word_contains_all_letters(word, letters):
@@ -42,16 +45,207 @@ def word_omits_all_letters(word, letters):
     return True
 
 
+def letter_array(ws, length=None) -> np.ndarray:
+    """
+    Return an `(N, length)` uint8 array holding the letters of each word
+    (`length` defaults to that of the first word)
+    """
+    ws = list(ws)
+    if length is None:
+        length = len(ws[0]) if ws else WORD_LENGTH
+    return np.frombuffer(''.join(ws).encode('ascii'), dtype=np.uint8).reshape(len(ws), length)
+
+
+class WordStore:
+    """
+    The word list as integer ids. Word `i` is `words[i]` and its letters are
+    the row `letters[i]` of a fixed-width uint8 array; code working on many
+    words should pass ids around and only look up strings for display.
+    """
+    def __init__(self, ws):
+        self.words = list(ws)
+        self.ids = {w: i for i, w in enumerate(self.words)}
+        self.letters = letter_array(self.words)
+        self.word_length = self.letters.shape[1]
+
+    def id_of(self, word) -> int:
+        return self.ids[word]
+
+    def ids_of(self, ws) -> np.ndarray:
+        return np.fromiter((self.ids[w] for w in ws), dtype=np.int32, count=len(ws))
+
+    def words_of(self, ids) -> list:
+        all_words = self.words
+        return [all_words[i] for i in ids]
+
+    def all_ids(self) -> np.ndarray:
+        return np.arange(len(self.words), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.words)
+
+
+class WordIndex:
+    """
+    Bitsets over a WordStore: for each letter, which words contain it (and
+    which contain it at least k times), and for each (letter, position),
+    which words have that letter there. Each bitset is a numpy bool array
+    indexed by word id.
+    """
+    def __init__(self, store: WordStore):
+        self.store = store
+        letters = store.letters
+        self.word_length = store.word_length
+        self.empty = np.zeros(len(store), dtype=bool)
+        self.position_masks = {}
+        self.letter_masks = {}
+        self.at_least_masks = {}
+        for let in ascii_lowercase:
+            at = letters == ord(let)
+            for pos in range(self.word_length):
+                self.position_masks[(let, pos)] = at[:, pos].copy()
+            self.letter_masks[let] = at.any(axis=1)
+            counts = at.sum(axis=1)
+            for k in range(1, self.word_length + 1):
+                self.at_least_masks[(let, k)] = counts >= k
+        # presence[i, j] is 1 if word i contains the j-th letter of the alphabet
+        self.presence = np.stack([self.letter_masks[let] for let in ascii_lowercase], axis=1).astype(np.int64)
+
+    def letter_mask(self, let):
+        return self.letter_masks.get(let, self.empty)
+
+    def at_least_mask(self, let, k):
+        """
+        Words containing `let` at least `k` times
+        """
+        if k <= 0:
+            return ~self.empty
+        return self.at_least_masks.get((let, k), self.empty)
+
+    def position_mask(self, let, pos):
+        return self.position_masks.get((let, pos), self.empty)
+
+    def mask_of(self, ws):
+        """
+        Return the bitset of words in `ws`, or None if some word isn't indexed
+        """
+        mask = np.zeros(len(self.store), dtype=bool)
+        try:
+            mask[[self.store.ids[w] for w in ws]] = True
+        except KeyError:
+            return None
+        return mask
+
+
+class WordView:
+    """
+    A read-only sequence of words selected from the word list by a bitset.
+    Filters combine views with bitwise ANDs; strings are only materialized
+    when the view is iterated or indexed.
+
+    A filtered view remembers the view it came from, so its letter counts
+    can be updated from an ancestor's by subtracting the removed words.
+    """
+    def __init__(self, mask, index=None, parent=None):
+        self.index = get_word_index() if index is None else index
+        self.mask = mask
+        self.parent = parent
+        self._words = None
+        self._letter_counts = None
+
+    @property
+    def ids(self) -> np.ndarray:
+        return np.flatnonzero(self.mask)
+
+    def words(self):
+        if self._words is None:
+            self._words = self.index.store.words_of(self.ids)
+        return self._words
+
+    def __len__(self):
+        if self._words is not None:
+            return len(self._words)
+        return int(np.count_nonzero(self.mask))
+
+    def __iter__(self):
+        return iter(self.words())
+
+    def __getitem__(self, i):
+        return self.words()[i]
+
+    def __contains__(self, word):
+        i = self.index.store.ids.get(word)
+        return i is not None and bool(self.mask[i])
+
+    def letter_counts(self) -> np.ndarray:
+        """
+        The number of words in this view containing each letter, as a
+        length-26 array
+        """
+        if self._letter_counts is None:
+            ancestor = self.parent
+            while ancestor is not None and ancestor._letter_counts is None:
+                ancestor = ancestor.parent
+            removed = None if ancestor is None else ancestor.mask & ~self.mask
+            if removed is not None and np.count_nonzero(removed) < len(self):
+                self._letter_counts = ancestor._letter_counts - self.index.presence[removed].sum(axis=0)
+            else:
+                self._letter_counts = self.index.presence[self.mask].sum(axis=0)
+            self.parent = None
+        return self._letter_counts
+
+    def top_n_by_freqs(self, n=5):
+        """
+        Return the `n` words with the highest letter-frequency scores as
+        `(word, score)` pairs, highest first; ties keep word list order
+        """
+        ids = self.ids
+        scores = self.index.presence[ids] @ self.letter_counts()
+        if n < len(scores):
+            kth = np.partition(scores, len(scores) - n)[len(scores) - n]
+            above = np.flatnonzero(scores > kth)
+            tied = np.flatnonzero(scores == kth)[:n - len(above)]
+            top = np.sort(np.concatenate([above, tied]))
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        words = self.index.store.words
+        return [(words[ids[i]], int(scores[i])) for i in top]
+
+
+def all_words() -> WordView:
+    return WordView(np.ones(len(get_word_store()), dtype=bool))
+
+
+def _as_view(ws):
+    """
+    Return `ws` as a WordView, or None if it holds words outside the index
+    """
+    if ws is None:
+        return all_words()
+    if isinstance(ws, WordView):
+        return ws
+    index = get_word_index()
+    mask = index.mask_of(ws)
+    if mask is None:
+        return None
+    return WordView(mask, index)
+
+
 def omit_letters(letters, ws=None):
     """
-    Return a list of words which contain none of the provided letters
+    Return the words which contain none of the provided letters
     :param letters:
-    :param ws:
-    :return:
+    :param ws: a list or WordView of words to filter (default: all words)
+    :return: a WordView, or a list if `ws` holds unindexed words
     """
-    if ws is None:
-        ws = get_words()
-    return [w for w in ws if word_omits_all_letters(w, letters)]
+    view = _as_view(ws)
+    if view is None:
+        return [w for w in ws if word_omits_all_letters(w, letters)]
+    mask = view.mask.copy()
+    for let in set(letters):
+        mask &= ~view.index.letter_mask(let)
+    return WordView(mask, view.index, parent=view)
 
 
 def _word_has_letters_at_positions(word, positions):
@@ -62,9 +256,13 @@ def _word_has_letters_at_positions(word, positions):
 
 
 def with_letters_at_positions(positions, ws=None):
-    if ws is None:
-        ws = get_words()
-    return [w for w in ws if _word_has_letters_at_positions(w, positions)]
+    view = _as_view(ws)
+    if view is None:
+        return [w for w in ws if _word_has_letters_at_positions(w, positions)]
+    mask = view.mask.copy()
+    for (let, pos) in positions:
+        mask &= view.index.position_mask(let, pos)
+    return WordView(mask, view.index, parent=view)
 
 
 def _word_has_letters_not_at_positions(word, positions):
@@ -75,15 +273,69 @@ def _word_has_letters_not_at_positions(word, positions):
 
 
 def with_letters_not_at_positions(positions, ws=None):
-    if ws is None:
-        ws = get_words()
-    return [w for w in ws if _word_has_letters_not_at_positions(w, positions)]
+    view = _as_view(ws)
+    if view is None:
+        return [w for w in ws if _word_has_letters_not_at_positions(w, positions)]
+    mask = view.mask.copy()
+    for (let, pos) in positions:
+        mask &= view.index.letter_mask(let)
+        mask &= ~view.index.position_mask(let, pos)
+    return WordView(mask, view.index, parent=view)
+
+
+def _word_has_no_letters_at_positions(word, positions):
+    for (let, pos) in positions:
+        if 0 <= pos < len(word) and word[pos] == let:
+            return False
+    return True
+
+
+def without_letters_at_positions(positions, ws=None):
+    """
+    Return the words that don't have any of the given (letter, position)s
+    """
+    view = _as_view(ws)
+    if view is None:
+        return [w for w in ws if _word_has_no_letters_at_positions(w, positions)]
+    mask = view.mask.copy()
+    for (let, pos) in positions:
+        mask &= ~view.index.position_mask(let, pos)
+    return WordView(mask, view.index, parent=view)
+
+
+def _word_has_letter_counts(word, counts):
+    for let, (low, high) in counts.items():
+        n = word.count(let)
+        if n < low or (high is not None and n > high):
+            return False
+    return True
+
+
+def with_letter_counts(counts, ws=None):
+    """
+    Return the words whose letter counts are within bounds
+    :param counts: a map from letter to `(min, max)` occurrences, where
+        max may be None for no upper bound
+    """
+    view = _as_view(ws)
+    if view is None:
+        return [w for w in ws if _word_has_letter_counts(w, counts)]
+    mask = view.mask.copy()
+    for let, (low, high) in counts.items():
+        mask &= view.index.at_least_mask(let, low)
+        if high is not None:
+            mask &= ~view.index.at_least_mask(let, high + 1)
+    return WordView(mask, view.index, parent=view)
 
 
 def get_letter_frequencies(ws=None, verbose=False):
     if ws is None:
-        ws = get_words()
-    freqs = {let: len([w for w in ws if let in w]) for let in ascii_lowercase}
+        ws = all_words()
+    view = _as_view(ws)
+    if view is not None:
+        freqs = dict(zip(ascii_lowercase, view.letter_counts().tolist()))
+    else:
+        freqs = {let: len([w for w in ws if let in w]) for let in ascii_lowercase}
     if verbose:
         for let in ascii_lowercase:
             print(f"{let}: {freqs[let]:6}  ({100 * freqs[let] / len(ws)}%)")
@@ -117,19 +369,116 @@ def get_max_word_by_freqs(words=None):
 
 
 def get_top_n_words_by_freqs(words=None, n=5):
+    """
+    Return the `n` words scoring highest by letter frequency in `words`.
+    Indexed words are scored with one product against the letter-presence
+    matrix, reusing letter counts maintained as filters narrow the words.
+    """
+    view = _as_view(words)
+    if view is not None:
+        return view.top_n_by_freqs(n)
     scores = sorted(list(score_words_by_freqs(words=words).items()), key=lambda t: t[1], reverse=True)
     return scores[:n]
 
 
+WORDFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "wordfiles")
+WORDS_FILE = os.path.join(WORDFILES_DIR, "valid_wordle_words.txt")
+WORD_LENGTH = 5
+DEFAULT_OPENER = "tares"
+
 letter_set = set(ascii_lowercase)
-_WORDS = []
-_WORDS_SET = set()
-with open("../wordfiles/valid_wordle_words.txt") as f:
-    _WORDS = [w.strip() for w in f.readlines()]
-    _WORDS = [w for w in _WORDS if len(w) == 5]
-    _WORDS = omit_letters("ABCDEFGHIJKLMNOPQRSTUVWXYZ", _WORDS)
-    _WORDS = [w for w in _WORDS if set(w).issubset(letter_set)]
-
-    with open("../wordfiles/words2", 'w+') as f:
-        f.write('\n'.join(_WORDS))
-    _WORDS_SET = set(_WORDS)
+_WORDS = None
+_WORDS_SET = None
+_WORD_STORE = None
+_WORD_INDEX = None
+# The active dictionary: the word file and the length of words kept from it
+_DICTIONARY = (WORDS_FILE, WORD_LENGTH)
+
+
+def set_dictionary(path=None, length=WORD_LENGTH):
+    """
+    Play with the `length`-letter words of the word file `path` (default:
+    the Wordle word list). `path` may also name a file in `wordfiles/`,
+    such as "20k.txt". Everything derived from the word list is rebuilt on
+    next use.
+    """
+    global _DICTIONARY, _WORDS, _WORDS_SET, _WORD_STORE, _WORD_INDEX
+    if path is None:
+        path = WORDS_FILE
+    elif not os.path.exists(path) and os.path.exists(os.path.join(WORDFILES_DIR, path)):
+        path = os.path.join(WORDFILES_DIR, path)
+    if not os.path.exists(path):
+        raise ValueError(f"No word file {path}")
+    _DICTIONARY = (path, length)
+    _WORDS = _WORDS_SET = _WORD_STORE = _WORD_INDEX = None
+
+
+def get_dictionary():
+    """
+    Return the active `(word file, word length)`
+    """
+    return _DICTIONARY
+
+
+def word_length() -> int:
+    return _DICTIONARY[1]
+
+
+def default_first_words():
+    """
+    The default opening guesses: the default opener, if the dictionary
+    has it
+    """
+    return [DEFAULT_OPENER] if is_valid_word(DEFAULT_OPENER) else []
+
+
+def get_word_store() -> WordStore:
+    global _WORD_STORE
+    if _WORD_STORE is None:
+        _WORD_STORE = WordStore(_load_words())
+    return _WORD_STORE
+
+
+def get_word_index() -> WordIndex:
+    global _WORD_INDEX
+    if _WORD_INDEX is None:
+        _WORD_INDEX = WordIndex(get_word_store())
+    return _WORD_INDEX
+
+
+def read_word_file(path, length=WORD_LENGTH):
+    """
+    Read a word file, keeping the first occurrence of each lowercase word
+    of the given length
+    """
+    with open(path) as f:
+        ws = [w.strip() for w in f.readlines()]
+    return list(dict.fromkeys(w for w in ws if len(w) == length and set(w).issubset(letter_set)))
+
+
+def _load_words():
+    """
+    Load the word list on first use; it is cached for the rest of the process
+    """
+    global _WORDS
+    if _WORDS is None:
+        _WORDS = read_word_file(*_DICTIONARY)
+    return _WORDS
+
+
+def _load_word_set():
+    global _WORDS_SET
+    if _WORDS_SET is None:
+        _WORDS_SET = set(_load_words())
+    return _WORDS_SET
+
+
+def write_words(path=None):
+    """
+    Dump the filtered word list, one word per line (to `wordfiles/words2`
+    by default)
+    """
+    if path is None:
+        path = os.path.join(WORDFILES_DIR, "words2")
+    with open(path, 'w+') as f:
+        f.write('\n'.join(_load_words()))